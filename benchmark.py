@@ -0,0 +1,277 @@
+"""
+Benchmark do HarvestReport com dados sintéticos.
+
+Gera conjuntos de perdas agrícolas realistas e reprodutíveis (semente fixa) e mede tempo e pico
+de memória das principais operações, além da memória retida por registro carregado e da vazão
+de consultas com várias threads leitoras, gravando o resultado em JSON para comparação entre execuções.
+
+Exemplos:
+    python benchmark.py --sizes 1000 100000 --output bench.json
+    python benchmark.py --sizes 1000000 --backend columnar --skip-db
+    python benchmark.py --sizes 1000 --compare bench.json
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List
+
+from core import HarvestReport
+from database import SQLiteDatabase
+from json_stream import write_json_lines
+from logger_config import logger
+
+# Produtividade típica (t/ha) usada para gerar a produção estimada de cada cultura
+PRODUTIVIDADE = {
+    "Soja": 3.5,
+    "Milho": 6.0,
+    "Feijão": 1.2,
+    "Trigo": 3.0,
+    "Arroz": 6.5,
+    "Café": 1.8,
+    "Cana": 75.0,
+    "Algodão": 4.2,
+}
+
+OBSERVACOES = ["", "", "", "", "Chuva intensa", "Seca prolongada", "Pragas", "Granizo", "Geada",
+               "Falha na colheitadeira"]
+
+
+def gerar_registros(n: int,
+                    seed: int = 42,
+                    culturas: List[str] | None = None,
+                    inicio: date = date(2020, 1, 1),
+                    fim: date = date(2024, 12, 31)) -> Iterator[dict]:
+    """Gera `n` registros no formato de `HarvestLoss.dict`, de forma determinística pela semente."""
+    rng = random.Random(seed)
+    culturas = culturas or list(PRODUTIVIDADE)
+    dias = (fim - inicio).days
+
+    for id_ in range(1, n + 1):
+        cultura = rng.choice(culturas)
+        area = round(rng.uniform(1, 500), 1)
+        estimada = round(area * PRODUTIVIDADE.get(cultura, 3.0) * rng.uniform(0.8, 1.2), 2)
+        # Perdas concentradas entre 0% e 20%, com cauda para eventos climáticos severos
+        perda = min(rng.betavariate(2, 12), 0.95)
+        yield {
+            "id": id_,
+            "cultura": cultura,
+            "area_plantada_ha": area,
+            "prod_estimada_t": estimada,
+            "prod_real_t": round(estimada * (1 - perda), 2),
+            "data_colheita": (inicio + timedelta(days=rng.randint(0, dias))).isoformat(),
+            "obs": rng.choice(OBSERVACOES),
+        }
+
+
+def escrever_dataset(path: str, n: int, **kwargs) -> str:
+    """Grava o conjunto sintético em JSON Lines (ou array JSON se o arquivo terminar em '.json')."""
+    registros = gerar_registros(n, **kwargs)
+    if path.endswith(".jsonl"):
+        write_json_lines(path, registros)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(registros), f, ensure_ascii=False)
+    return path
+
+
+def medir(funcao: Callable[[], object], repeticoes: int = 1) -> Dict[str, float]:
+    """Mede o melhor tempo entre `repeticoes` execuções e o pico de memória de uma execução extra."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"segundos": round(min(tempos), 6), "pico_memoria_bytes": pico}
+
+
+def bytes_por_registro(relatorio: HarvestReport, entrada: str, n: int) -> float:
+    """Memória que continua alocada após carregar `entrada` (registros e armazenamento), por registro."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        relatorio.load_from_json(entrada)
+        gc.collect()
+        retida, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(retida / n, 1) if n else 0.0
+
+
+def medir_concorrencia(relatorio: HarvestReport, cultura: str, leitores: int, segundos: float = 1.0) -> dict:
+    """
+    Consultas por segundo com `leitores` threads alternando estatísticas e filtro por cultura,
+    enquanto uma thread escritora registra uma perda por milissegundo.
+    """
+    parar = threading.Event()
+    consultas = [0] * leitores
+    escritas = 0
+
+    def ler(i: int) -> None:
+        while not parar.is_set():
+            relatorio.culture_statistics()
+            relatorio.filter_by_culture(cultura)
+            consultas[i] += 2
+
+    def escrever() -> None:
+        nonlocal escritas
+        while not parar.is_set():
+            relatorio.register_loss(cultura, 10.0, 30.0, 27.0, "01/03/2024")
+            escritas += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=ler, args=(i,)) for i in range(leitores)]
+    threads.append(threading.Thread(target=escrever))
+    for thread in threads:
+        thread.start()
+    time.sleep(segundos)
+    parar.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "leitores": leitores,
+        "consultas_por_segundo": round(sum(consultas) / segundos),
+        "escritas_por_segundo": round(escritas / segundos),
+    }
+
+
+def executar(tamanhos: List[int],
+             seed: int = 42,
+             culturas: List[str] | None = None,
+             inicio: date = date(2020, 1, 1),
+             fim: date = date(2024, 12, 31),
+             backend: str = "row",
+             repeticoes: int = 1,
+             incluir_db: bool = True,
+             diretorio: str | None = None,
+             leitores: List[int] = (1, 2, 4)) -> dict:
+    resultados = []
+    memoria = []
+    concorrencia = []
+    cultura_filtro = (culturas or list(PRODUTIVIDADE))[0]
+
+    with tempfile.TemporaryDirectory(dir=diretorio) as tmp:
+        for n in tamanhos:
+            entrada = escrever_dataset(os.path.join(tmp, f"dados_{n}.jsonl"), n, seed=seed,
+                                       culturas=culturas, inicio=inicio, fim=fim)
+            saida = os.path.join(tmp, f"saida_{n}.jsonl")
+            grafico = os.path.join(tmp, "grafico.png")
+            relatorio = HarvestReport(backend)
+            with contextlib.redirect_stdout(io.StringIO()):
+                por_registro = bytes_por_registro(relatorio, entrada, n)
+            memoria.append({"tamanho": n, "bytes_por_registro": por_registro})
+            print(f"{n:>10} {'bytes/registro':<18} {por_registro:>10.1f} B")
+
+            operacoes = {
+                "load_from_json": lambda: relatorio.load_from_json(entrada),
+                "export_to_json": lambda: relatorio.export_to_json(saida),
+                "filter_by_culture": lambda: relatorio.filter_by_culture(cultura_filtro),
+                "get_statistics": lambda: relatorio.get_statistics(grafico),
+                "updated": relatorio.updated,
+            }
+            if incluir_db:
+                operacoes["export_to_db"] = lambda: relatorio.export_to_db(SQLiteDatabase(), batch_size=5000)
+
+            for nome, funcao in operacoes.items():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    medida = medir(funcao, repeticoes)
+                resultados.append({"tamanho": n, "operacao": nome, **medida})
+                print(f"{n:>10} {nome:<18} {medida['segundos']:>10.4f}s "
+                      f"{medida['pico_memoria_bytes'] / 1024 / 1024:>10.1f} MiB")
+
+            # Por último, pois as escritas alteram o conjunto de dados
+            for quantidade in leitores:
+                medida = medir_concorrencia(relatorio, cultura_filtro, quantidade)
+                concorrencia.append({"tamanho": n, **medida})
+                print(f"{n:>10} {f'{quantidade} leitor(es)':<18} {medida['consultas_por_segundo']:>10} consultas/s "
+                      f"{medida['escritas_por_segundo']:>6} escritas/s")
+
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "backend": backend,
+            "seed": seed,
+            "repeticoes": repeticoes,
+        },
+        "resultados": resultados,
+        "memoria": memoria,
+        "concorrencia": concorrencia,
+    }
+
+
+def comparar(atual: dict, anterior: dict, tolerancia: float = 0.2) -> List[str]:
+    """Lista as operações que ficaram mais lentas que `anterior` além da tolerância (20% por padrão)."""
+    base = {(r["tamanho"], r["operacao"]): r for r in anterior["resultados"]}
+    regressoes = []
+    for r in atual["resultados"]:
+        antigo = base.get((r["tamanho"], r["operacao"]))
+        if antigo is None or antigo["segundos"] == 0:
+            continue
+        razao = r["segundos"] / antigo["segundos"]
+        if razao > 1 + tolerancia:
+            regressoes.append(f"{r['operacao']} (n={r['tamanho']}): {antigo['segundos']}s -> "
+                              f"{r['segundos']}s ({razao:.2f}x)")
+    return regressoes
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do HarvestReport com dados sintéticos.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="tamanhos dos conjuntos (ex: 1000 ... 10000000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cultures", nargs="+", default=None, help="culturas geradas")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2020, 1, 1), help="AAAA-MM-DD")
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2024, 12, 31), help="AAAA-MM-DD")
+    parser.add_argument("--backend", choices=["row", "columnar"], default="row")
+    parser.add_argument("--repeat", type=int, default=1, help="repetições por operação (melhor tempo)")
+    parser.add_argument("--skip-db", action="store_true", help="não mede export_to_db")
+    parser.add_argument("--readers", type=int, nargs="*", default=[1, 2, 4],
+                        help="threads leitoras na medição concorrente (vazio para não medir)")
+    parser.add_argument("--workdir", default=None, help="diretório para os arquivos temporários")
+    parser.add_argument("--output", default="bench_results.json", help="arquivo JSON de resultados")
+    parser.add_argument("--compare", default=None, help="resultado anterior para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="tolerância de regressão (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    logger.setLevel(logging.WARNING)
+    resultado = executar(args.sizes, seed=args.seed, culturas=args.cultures, inicio=args.start,
+                         fim=args.end, backend=args.backend, repeticoes=args.repeat,
+                         incluir_db=not args.skip_db, diretorio=args.workdir, leitores=args.readers)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=4, ensure_ascii=False)
+    print(f"✅ Resultados gravados em '{args.output}'.")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressoes = comparar(resultado, json.load(f), args.tolerance)
+        for regressao in regressoes:
+            print(f"❌ Regressão: {regressao}")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
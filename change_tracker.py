@@ -0,0 +1,44 @@
+from typing import Dict, Optional, Set
+
+
+class ChangeTracker:
+    """
+    Registra as alterações feitas desde o último ponto de referência (carga ou salvamento).
+
+    Para cada id alterado guarda o registro original (imutável) e mantém o conjunto de ids
+    cujo estado atual difere dele. Assim `alterado()` é O(1) e uma alteração desfeita
+    (ex: editar e voltar ao valor anterior) deixa de contar como pendente.
+    """
+
+    def __init__(self) -> None:
+        self._originais: Dict[int, Optional[object]] = {}
+        self._divergentes: Set[int] = set()
+        self.versao = 0
+
+    def registrar(self, id_: int, antes: Optional[object], depois: Optional[object]) -> None:
+        """Registra a mudança do registro `id_` de `antes` para `depois` (None = inexistente)."""
+        if id_ not in self._originais:
+            self._originais[id_] = antes
+
+        self.versao += 1
+        if depois == self._originais[id_]:
+            self._divergentes.discard(id_)
+        else:
+            self._divergentes.add(id_)
+
+    def alterado(self) -> bool:
+        return bool(self._divergentes)
+
+    def alterados(self) -> Set[int]:
+        """Ids cujo estado atual difere do ponto de referência."""
+        return set(self._divergentes)
+
+    def original(self, id_: int) -> Optional[object]:
+        """Estado do registro no ponto de referência (só para ids alterados)."""
+        return self._originais.get(id_)
+
+    def reiniciar(self) -> None:
+        """Define o estado atual como novo ponto de referência."""
+        self._originais.clear()
+        self._divergentes.clear()
+        self.versao += 1
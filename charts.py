@@ -0,0 +1,107 @@
+"""
+Geração do gráfico de perda média por cultura, com cache em disco e renderização em segundo plano.
+
+Cada imagem é acompanhada de um arquivo '<imagem>.fingerprint' com o hash dos valores agregados
+usados no desenho; se os valores não mudaram, a imagem existente é reaproveitada sem renderizar.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from logger_config import logger
+
+# Incrementar quando o layout do gráfico mudar, para invalidar as imagens em cache
+VERSAO_GRAFICO = 1
+
+_executor: ThreadPoolExecutor | None = None
+_em_andamento: Dict[Tuple[str, str], Future] = {}
+_lock = threading.Lock()
+
+
+def fingerprint(culturas: List[str], perdas_medias: List[float]) -> str:
+    conteudo = json.dumps([VERSAO_GRAFICO, culturas, perdas_medias], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _arquivo_fingerprint(path: str) -> str:
+    return f"{path}.fingerprint"
+
+
+def em_cache(path: str, digest: str) -> bool:
+    """Indica se a imagem em `path` foi gerada a partir dos mesmos valores agregados."""
+    try:
+        with open(_arquivo_fingerprint(path), "r", encoding="utf-8") as f:
+            return f.read().strip() == digest and os.path.exists(path)
+    except OSError:
+        return False
+
+
+def _desenhar(culturas: List[str], perdas_medias: List[float], path: str, digest: str) -> str:
+    """
+    Desenha o gráfico de barras. O matplotlib só é importado aqui, com o backend 'Agg' (sem janela)
+    e a API orientada a objetos, que pode ser usada fora da thread principal.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(10, 6))
+    eixo = figura.subplots()
+    eixo.bar(culturas, perdas_medias)
+    eixo.set_title("Perda Média por Cultura (%)")
+    eixo.set_xlabel("Cultura")
+    eixo.set_ylabel("Perda Média (%)")
+    eixo.grid(True, linestyle="--", alpha=0.5)
+    figura.tight_layout()
+
+    # Grava em arquivo temporário e substitui, para nunca servir uma imagem incompleta
+    raiz, extensao = os.path.splitext(path)
+    temporario = f"{raiz}.tmp{extensao}"
+    figura.savefig(temporario)
+    os.replace(temporario, path)
+    with open(_arquivo_fingerprint(path), "w", encoding="utf-8") as f:
+        f.write(digest)
+
+    logger.info(f"📈 Gráfico renderizado em '{path}'.")
+    return path
+
+
+def render_chart(culturas: List[str], perdas_medias: List[float], path: str) -> str:
+    """Gera o gráfico de forma síncrona, reaproveitando a imagem em cache quando possível."""
+    return render_chart_async(culturas, perdas_medias, path).result()
+
+
+def render_chart_async(culturas: List[str], perdas_medias: List[float], path: str) -> Future:
+    """
+    Agenda a geração do gráfico em uma thread de trabalho e retorna um Future com o caminho da imagem.
+    Se a imagem em cache estiver atualizada, o Future já vem concluído; pedidos iguais em andamento
+    compartilham o mesmo Future.
+    """
+    global _executor
+    digest = fingerprint(culturas, perdas_medias)
+
+    if em_cache(path, digest):
+        futuro: Future = Future()
+        futuro.set_result(path)
+        return futuro
+
+    chave = (os.path.abspath(path), digest)
+    with _lock:
+        futuro = _em_andamento.get(chave)
+        if futuro is not None:
+            return futuro
+
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grafico")
+        futuro = _executor.submit(_desenhar, list(culturas), list(perdas_medias), path, digest)
+        _em_andamento[chave] = futuro
+
+    def _concluir(_: Future) -> None:
+        with _lock:
+            _em_andamento.pop(chave, None)
+
+    futuro.add_done_callback(_concluir)
+    return futuro
@@ -0,0 +1,183 @@
+"""
+Modo de linha de comando não interativo (para cron, pipelines e scripts).
+
+Exemplos:
+    python main.py import json --input data.json
+    python main.py import json --input "fazendas/*.json" --workers 8
+    python main.py export db --source json --input data.json --batch-size 5000
+    python main.py export json --source db --output backup.jsonl
+    python main.py stats --format json
+    python main.py chart --output perdas_por_cultura.png
+    python main.py startup --budget-ms 300
+
+Códigos de saída: 0 sucesso, 1 falha na operação, 2 uso incorreto, 3 fonte de dados indisponível.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+from typing import List
+
+from core import HarvestReport
+from database import create_database
+from logger_config import console_handler, logger
+from startup import import_time_report
+
+EXIT_OK = 0
+EXIT_FALHA = 1
+EXIT_USO = 2
+EXIT_FONTE = 3
+
+
+class FonteIndisponivel(Exception):
+    """A fonte de dados (arquivo JSON ou banco) não pôde ser usada."""
+
+
+def _parser() -> argparse.ArgumentParser:
+    saida = argparse.ArgumentParser(add_help=False)
+    saida.add_argument("--format", choices=["text", "json"], default="text",
+                       help="formato da saída em stdout")
+    saida.add_argument("--quiet", action="store_true", help="mostra apenas avisos e erros no log")
+
+    comum = argparse.ArgumentParser(add_help=False, parents=[saida])
+    comum.add_argument("--source", choices=["json", "db"], default="json",
+                       help="origem dos dados carregados em memória (padrão: json)")
+    comum.add_argument("--input", default="data.json",
+                       help="arquivo JSON/JSON Lines, snapshot '.hls', diretório ou padrão glob de entrada")
+    comum.add_argument("--workers", type=int, default=None,
+                       help="processos usados na leitura de vários arquivos (padrão: um por núcleo)")
+    comum.add_argument("--backend", choices=["row", "columnar"], default="row",
+                       help="backend de armazenamento em memória")
+    comum.add_argument("--db-backend", choices=["oracle", "sqlite"], default=None,
+                       help="backend de banco (padrão: variável DB_BACKEND ou 'oracle')")
+
+    parser = argparse.ArgumentParser(prog="main.py", description="Sistema Controle Agrícola - modo batch")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    importar = sub.add_parser("import", parents=[comum], help="carrega e valida os dados de uma origem")
+    importar.add_argument("origem", choices=["json", "db"], help="origem dos dados")
+
+    exportar = sub.add_parser("export", parents=[comum], help="carrega da origem e grava no destino")
+    exportar.add_argument("destino", choices=["json", "db"], help="destino dos dados")
+    exportar.add_argument("--output", default="data.json", help="arquivo de saída (destino json)")
+    exportar.add_argument("--batch-size", type=int, default=1000, help="registros por lote (destino db)")
+
+    sub.add_parser("stats", parents=[comum], help="exibe as estatísticas de perdas")
+
+    grafico = sub.add_parser("chart", parents=[comum], help="gera o gráfico de perdas por cultura")
+    grafico.add_argument("--output", default="perdas_por_cultura.png", help="arquivo PNG de saída")
+
+    inicializacao = sub.add_parser("startup", parents=[saida],
+                                   help="mede o tempo de importação da aplicação a frio")
+    inicializacao.add_argument("--module", default="main", help="módulo medido (padrão: main)")
+    inicializacao.add_argument("--top", type=int, default=10, help="quantidade de importações listadas")
+    inicializacao.add_argument("--budget-ms", type=float, default=None,
+                               help="orçamento de importação; acima dele a saída é 1")
+
+    return parser
+
+
+def _conectar(args: argparse.Namespace):
+    try:
+        return create_database(args.db_backend)
+    except Exception as e:
+        raise FonteIndisponivel(f"Banco de dados indisponível: {e}") from e
+
+
+def _carregar(relatorio: HarvestReport, args: argparse.Namespace, origem: str) -> None:
+    if origem == "json":
+        if os.path.isdir(args.input) or any(c in args.input for c in "*?["):
+            if relatorio.load_from_files(args.input, workers=args.workers)["arquivos"] == 0:
+                raise FonteIndisponivel(f"Nenhum arquivo JSON encontrado em '{args.input}'.")
+            return
+        if not os.path.exists(args.input):
+            raise FonteIndisponivel(f"Arquivo '{args.input}' não encontrado.")
+        if args.input.endswith(".hls"):
+            relatorio.load_from_snapshot(args.input)
+        else:
+            relatorio.load_from_json(args.input)
+    else:
+        relatorio.load_from_db(_conectar(args).read_iter())
+
+
+def _executar(args: argparse.Namespace) -> tuple[int, dict]:
+    if args.comando == "startup":
+        resumo = import_time_report(args.module, args.top)
+        if args.budget_ms is not None and resumo["importacao_ms"] > args.budget_ms:
+            return EXIT_FALHA, {**resumo, "erro": f"Orçamento de {args.budget_ms} ms excedido."}
+        return EXIT_OK, resumo
+
+    relatorio = HarvestReport(args.backend)
+    if args.comando == "import":
+        _carregar(relatorio, args, args.origem)
+        return EXIT_OK, {"registros": len(relatorio), "culturas": relatorio.culture_counts()}
+
+    if args.comando in ("stats", "chart") and args.source == "db":
+        # Agregação feita no servidor: não é preciso carregar a tabela inteira
+        db = _conectar(args)
+        if args.comando == "stats":
+            return EXIT_OK, relatorio.statistics_summary(db_instance=db)
+        return _grafico(relatorio, args, db)
+
+    _carregar(relatorio, args, args.source)
+
+    if args.comando == "export":
+        if args.destino == "json":
+            total = relatorio.export_to_json(args.output)
+            return EXIT_OK, {"exportados": total, "arquivo": args.output}
+        sucesso, falhas = relatorio.export_to_db(_conectar(args), batch_size=args.batch_size)
+        return (EXIT_FALHA if falhas else EXIT_OK), {"sucesso": sucesso, "falhas": falhas}
+
+    if args.comando == "stats":
+        return EXIT_OK, relatorio.statistics_summary()
+    return _grafico(relatorio, args)
+
+
+def _grafico(relatorio: HarvestReport, args: argparse.Namespace, db=None) -> tuple[int, dict]:
+    path = relatorio.save_chart(args.output, db_instance=db)
+    if path is None:
+        return EXIT_FALHA, {"erro": "Nenhuma perda registrada para análise."}
+    return EXIT_OK, {"grafico": path}
+
+
+def _imprimir_texto(resultado: dict) -> None:
+    for chave, valor in resultado.items():
+        if isinstance(valor, dict):
+            print(f"{chave}:")
+            for sub_chave, sub_valor in valor.items():
+                print(f"  {sub_chave}: {sub_valor}")
+        elif isinstance(valor, list) and valor and isinstance(valor[0], dict):
+            print(f"{chave}:")
+            for item in valor:
+                print("  " + " | ".join(str(v) for v in item.values()))
+        else:
+            print(f"{chave}: {valor}")
+
+
+def main(argv: List[str] | None = None) -> int:
+    try:
+        args = _parser().parse_args(argv)
+    except SystemExit as e:
+        return EXIT_OK if e.code == 0 else EXIT_USO
+
+    if args.quiet:
+        console_handler.setLevel(logging.WARNING)
+
+    # As mensagens das operações vão para stderr; stdout fica reservado ao resultado
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            codigo, resultado = _executar(args)
+    except FonteIndisponivel as e:
+        logger.error(str(e))
+        codigo, resultado = EXIT_FONTE, {"erro": str(e)}
+    except Exception as e:
+        logger.error(f"Erro no modo batch: {e}")
+        codigo, resultado = EXIT_FALHA, {"erro": str(e)}
+
+    if args.format == "json":
+        print(json.dumps(resultado, ensure_ascii=False))
+    else:
+        _imprimir_texto(resultado)
+    return codigo
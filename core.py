@@ -1,15 +1,30 @@
-from dataclasses import dataclass
-from datetime import date, datetime
-from typing import List
-import json
+from copy import copy
+from dataclasses import FrozenInstanceError
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 import os
+import sys
+import threading
+import time
 from logger_config import logger
-import matplotlib.pyplot as plt
-from collections import defaultdict
-from database import Database
-import hashlib
+from database import BaseDatabase
+from dates import iso_column_to_ordinals, iso_to_ordinal, parse_br_date
+from storage import ColumnarStorage, RowStorage, percentual_perda
+from change_tracker import ChangeTracker
+from indexes import CultureAggregates, CultureIndex, CultureStats, DateIndex, PERIODOS, chave_periodo
+from ingest import parse_files, reassign_ids, resolve_files
+from json_stream import chunked, iter_json_records
+from journal import DELETE, INSERT, UPDATE, Journal, iter_journal
+from serializer import write_records
+from rwlock import ReadWriteLock
+from snapshot import open_snapshot, write_snapshot
+from charts import render_chart, render_chart_async
+from concurrent.futures import Future
+
+# Observação vazia compartilhada por todos os registros sem observação
+_SEM_OBS = ""
+
 
-@dataclass(frozen=True)
 class HarvestLoss:
     """
     Representa as informações sobre perdas de colheita.
@@ -22,15 +37,60 @@ class HarvestLoss:
         prod_real_t (float): Produção real obtida em toneladas;
         data_colheita (date): Data em que a colheita foi realizada;
         obs (str, opcional): Observações adicionais (padrão é string vazia).
+
+    Os registros são imutáveis e compactos: sem `__dict__` (slots), com a data guardada como
+    ordinal (`data_ordinal`) e as strings de cultura e observação internadas, de modo que
+    registros iguais compartilham o mesmo objeto. `data_colheita` aceita um `date` ou o ordinal.
     """
 
-    id: int
-    cultura: str
-    area_plantada_ha: float
-    prod_estimada_t: float
-    prod_real_t: float
-    data_colheita: date
-    obs: str = ""
+    __slots__ = ("id", "cultura", "area_plantada_ha", "prod_estimada_t", "prod_real_t", "data_ordinal", "obs")
+
+    def __init__(self,
+                 id: int,
+                 cultura: str,
+                 area_plantada_ha: float,
+                 prod_estimada_t: float,
+                 prod_real_t: float,
+                 data_colheita: date | int,
+                 obs: str = "") -> None:
+        definir = object.__setattr__
+        definir(self, "id", id)
+        definir(self, "cultura", sys.intern(cultura))
+        definir(self, "area_plantada_ha", area_plantada_ha)
+        definir(self, "prod_estimada_t", prod_estimada_t)
+        definir(self, "prod_real_t", prod_real_t)
+        definir(self, "data_ordinal", data_colheita if isinstance(data_colheita, int) else data_colheita.toordinal())
+        definir(self, "obs", sys.intern(obs) if obs else _SEM_OBS if obs is not None else None)
+
+    @property
+    def data_colheita(self) -> date:
+        return date.fromordinal(self.data_ordinal)
+
+    def _valores(self) -> tuple:
+        return (self.id, self.cultura, self.area_plantada_ha, self.prod_estimada_t, self.prod_real_t,
+                self.data_ordinal, self.obs)
+
+    def __setattr__(self, nome: str, valor) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{nome}'")
+
+    def __delattr__(self, nome: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{nome}'")
+
+    def __eq__(self, outro) -> bool:
+        if outro.__class__ is not self.__class__:
+            return NotImplemented
+        return self._valores() == outro._valores()
+
+    def __hash__(self) -> int:
+        return hash(self._valores())
+
+    def __repr__(self) -> str:
+        return (f"HarvestLoss(id={self.id!r}, cultura={self.cultura!r}, area_plantada_ha={self.area_plantada_ha!r}, "
+                f"prod_estimada_t={self.prod_estimada_t!r}, prod_real_t={self.prod_real_t!r}, "
+                f"data_colheita={self.data_colheita!r}, obs={self.obs!r})")
+
+    def __reduce__(self):
+        return self.__class__, self._valores()
 
     @property
     def dict(self) -> dict:
@@ -45,196 +105,769 @@ class HarvestLoss:
             "obs": self.obs,
         }
 
+    @classmethod
+    def from_dict(cls, item: dict) -> "HarvestLoss":
+        """Monta o registro a partir do formato de `dict` (data em 'AAAA-MM-DD')."""
+        return cls(
+            id=item["id"],
+            cultura=item["cultura"],
+            area_plantada_ha=item["area_plantada_ha"],
+            prod_estimada_t=item["prod_estimada_t"],
+            prod_real_t=item["prod_real_t"],
+            data_colheita=iso_to_ordinal(item["data_colheita"]),
+            obs=item.get("obs", "")
+        )
+
 
 class HarvestReport:
-    _original_hash = None
-    _data: List[HarvestLoss] = []
-    _id_counter: int = 1
+    """
+    Conjunto de perdas de colheita em memória, com índices, diário e sincronização com o banco.
 
-    @classmethod
-    def _gerar_hash(cls) -> str:
-        """Gera hash do estado atual dos dados"""
-        data_str = json.dumps([loss.dict for loss in cls._data], sort_keys=True)
-        return hashlib.md5(data_str.encode("utf-8")).hexdigest()
+    Pode ser usado por várias threads: consultas seguram a trava de leitura (várias ao mesmo
+    tempo) e alterações e cargas, a de escrita (ver rwlock.py). Como os registros são imutáveis,
+    as listas devolvidas pelas consultas são fotografias consistentes, que não mudam com escritas
+    posteriores. Cargas leem e convertem o arquivo antes de pegar a trava, que só é segurada
+    para trocar os dados.
+    """
 
-    @classmethod
-    def updated(cls) -> bool:
+    def __init__(self, backend: str = "row") -> None:
+        self._lock = ReadWriteLock()
+        # Os índices são montados sob demanda, inclusive durante leituras simultâneas
+        self._lock_indices = threading.RLock()
+        self._data: RowStorage | ColumnarStorage = self._novo_storage(backend)
+        self._alteracoes = ChangeTracker()
+        self._id_counter = 1
+        self._indice_culturas: CultureIndex | None = None
+        self._indice_agregados: CultureAggregates | None = None
+        self._indice_datas: DateIndex | None = None
+        self._diario: Journal | None = None
+        # Alterações desde a última carga/sincronização com o banco (None se os dados não vieram do banco)
+        self._sincronizacao: ChangeTracker | None = None
+
+    def __len__(self) -> int:
+        with self._lock.leitura():
+            return len(self._data)
+
+    def __iter__(self) -> Iterator[HarvestLoss]:
+        """Itera uma fotografia dos registros: escritas durante a iteração não a afetam."""
+        return iter(self.all())
+
+    def use_backend(self, backend: str = "row") -> None:
+        """
+        Troca o backend de armazenamento ('row' ou 'columnar'), migrando os registros atuais.
+        O backend 'columnar' guarda os dados em arrays NumPy e é indicado para grandes volumes.
+        """
+        with self._lock.escrita():
+            if backend == self._data.nome:
+                return
+
+            novo = self._novo_storage(backend)
+            novo.extend(self._data)
+            self._data = novo
+            self._invalidar_indices()
+        logger.info(f"🗄️ Backend de armazenamento alterado para '{backend}'.")
+
+    @staticmethod
+    def _novo_storage(backend: str) -> RowStorage | ColumnarStorage:
+        if backend == "row":
+            return RowStorage()
+        if backend == "columnar":
+            return ColumnarStorage(fabrica=HarvestLoss)
+        raise ValueError(f"Backend inválido: {backend}. Use 'row' ou 'columnar'.")
+
+    def _registrar_alteracao(self, antes: HarvestLoss | None, depois: HarvestLoss | None) -> None:
+        """Ponto único de registro das mutações feitas em _data (chamado com a trava de escrita)."""
+        id_ = antes.id if antes is not None else depois.id
+        self._alteracoes.registrar(id_, antes, depois)
+        if self._sincronizacao is not None:
+            self._sincronizacao.registrar(id_, antes, depois)
+
+        if self._diario is not None:
+            if depois is None:
+                self._diario.registrar(DELETE, id_)
+            else:
+                self._diario.registrar(INSERT if antes is None else UPDATE, id_, depois)
+
+        for indice in (self._indice_culturas, self._indice_agregados, self._indice_datas):
+            if indice is None:
+                continue
+            if antes is not None:
+                indice.remover(antes)
+            if depois is not None:
+                indice.adicionar(depois)
+
+    def _substituir_dados(self, novo: RowStorage | ColumnarStorage, sincronizacao: ChangeTracker | None) -> None:
+        """Troca os dados após uma carga completa (chamado com a trava de escrita)."""
+        self._data = novo
+        self._diario = None
+        self._sincronizacao = sincronizacao
+
+        # Atualiza o _id_counter para continuar a contagem
+        if self._data:
+            self._id_counter = self._data.max_id() + 1
+
+        self._alteracoes.reiniciar()
+        self._invalidar_indices()
+
+    def _invalidar_indices(self) -> None:
+        """Descarta os índices após cargas em lote; eles são reconstruídos na próxima consulta."""
+        self._indice_culturas = None
+        self._indice_agregados = None
+        self._indice_datas = None
+
+    def _culturas(self) -> CultureIndex:
+        with self._lock_indices:
+            if self._indice_culturas is None:
+                self._indice_culturas = CultureIndex(self._data.ids_por_cultura())
+            return self._indice_culturas
+
+    def _datas(self) -> DateIndex:
+        with self._lock_indices:
+            if self._indice_datas is None:
+                self._indice_datas = DateIndex(self._data.chaves_por_data())
+            return self._indice_datas
+
+    def _agregados(self) -> CultureAggregates:
+        with self._lock_indices:
+            if self._indice_agregados is None:
+                self._indice_agregados = CultureAggregates(
+                    self._data.agregados_por_cultura(),
+                    recalcular=lambda cultura: (
+                        percentual_perda(loss.prod_estimada_t, loss.prod_real_t)
+                        for loss in self.filter_by_culture(cultura)
+                    )
+                )
+            return self._indice_agregados
+
+    def _alocar_id(self) -> int:
+        """Reserva o próximo id. Chamado com a trava de escrita, então nenhum id é entregue duas vezes."""
+        id_ = self._id_counter
+        self._id_counter += 1
+        return id_
+
+    def updated(self) -> bool:
         """Verifica se os dados em memória foram alterados desde o carregamento"""
-        return cls._original_hash != cls._gerar_hash()
+        with self._lock.leitura():
+            return self._alteracoes.alterado()
 
-    @classmethod
-    def register_loss(cls,
+    def version(self) -> int:
+        """Contador incrementado a cada mutação (útil para invalidar caches)."""
+        with self._lock.leitura():
+            return self._alteracoes.versao
+
+    def register_loss(self,
                       cultura: str,
                       area_plantada_ha: float,
                       prod_estimada_t: float,
                       prod_real_t: float,
-                      data_colheita_str: str,
+                      data_colheita_str: str | date,
                       obs: str = "") -> HarvestLoss:
+        """Registra uma nova perda. A data pode vir como 'dd/mm/aaaa' ou já convertida (`date`)."""
+        if isinstance(data_colheita_str, date):
+            data_colheita = data_colheita_str
+        else:
+            try:
+                data_colheita = parse_br_date(data_colheita_str)
+            except ValueError as e:
+                raise ValueError(f"Formato de data inválido: {data_colheita_str}. Use 'dd/mm/aaaa'.") from e
 
-        try:
-            data_colheita = datetime.strptime(data_colheita_str, "%d/%m/%Y").date()
-        except ValueError as e:
-            raise ValueError(f"Formato de data inválido: {data_colheita_str}. Use 'dd/mm/aaaa'.") from e
-
-        loss = HarvestLoss(
-            id=cls._id_counter,
-            cultura=cultura,
-            area_plantada_ha=area_plantada_ha,
-            prod_estimada_t=prod_estimada_t,
-            prod_real_t=prod_real_t,
-            data_colheita=data_colheita,
-            obs=obs
-        )
+        with self._lock.escrita():
+            loss = HarvestLoss(
+                id=self._alocar_id(),
+                cultura=cultura,
+                area_plantada_ha=area_plantada_ha,
+                prod_estimada_t=prod_estimada_t,
+                prod_real_t=prod_real_t,
+                data_colheita=data_colheita,
+                obs=obs
+            )
 
-        cls._data.append(loss)
-        cls._id_counter += 1
+            self._data.append(loss)
+            self._registrar_alteracao(None, loss)
         return loss
 
-    @classmethod
-    def all(cls) -> List[HarvestLoss]:
-        return cls._data
-
-    @classmethod
-    def clear(cls) -> None:
-        cls._data.clear()
-
-    @classmethod
-    def summary(cls) -> List[dict]:
-        return [loss.dict for loss in cls._data]
-
-    @classmethod
-    def filter_by_culture(cls, cultura: str) -> List[HarvestLoss]:
+    def all(self) -> List[HarvestLoss]:
+        with self._lock.leitura():
+            return list(self._data)
+
+    def get(self, id_: int) -> HarvestLoss | None:
+        with self._lock.leitura():
+            return self._data.get(id_)
+
+    def remove_loss(self, id_: int) -> HarvestLoss | None:
+        """Remove o registro com o id informado, retornando-o (ou None se não existir)."""
+        with self._lock.escrita():
+            removido = self._data.remove(id_)
+            if removido is not None:
+                self._registrar_alteracao(removido, None)
+        return removido
+
+    def replace_loss(self, loss: HarvestLoss) -> None:
+        """Substitui o registro de mesmo id (o registro editado vai para o fim da lista)."""
+        with self._lock.escrita():
+            antes = self._data.remove(loss.id)
+            self._data.append(loss)
+            self._registrar_alteracao(antes, loss)
+
+    def clear(self) -> None:
+        with self._lock.escrita():
+            for loss in self._data:
+                self._registrar_alteracao(loss, None)
+            self._data.clear()
+
+    def summary(self) -> List[dict]:
+        return [loss.dict for loss in self.all()]
+
+    def filter_by_culture(self, cultura: str) -> List[HarvestLoss]:
         """
         Retorna todas as instâncias de HarvestLoss para uma cultura específica (case-insensitive).
+        Usa o índice de culturas, então o custo é proporcional ao tamanho do resultado.
         """
-        return [
-            loss for loss in cls._data
-            if loss.cultura.lower() == cultura.lower()
-        ]
+        with self._lock.leitura():
+            return self._data.get_many(self._culturas().ids(cultura))
 
-    @classmethod
-    def load_from_json(cls, path: str = "data.json") -> None:
+    def filter_by_date(self, data_inicio: date | None = None, data_fim: date | None = None) -> List[HarvestLoss]:
+        """
+        Registros com data de colheita entre `data_inicio` e `data_fim` (inclusivos; qualquer um pode
+        ser omitido), em ordem de data. Usa o índice de datas, sem percorrer todos os registros.
+        """
+        with self._lock.leitura():
+            return self._data.get_many(self._datas().ids(data_inicio, data_fim))
+
+    def page(self,
+             numero: int,
+             tamanho: int = 20,
+             cultura: str | None = None,
+             data_inicio: date | None = None,
+             data_fim: date | None = None) -> Tuple[List[HarvestLoss], int]:
+        """
+        Página `numero` (a partir de 1) dos registros, opcionalmente filtrados por cultura e datas.
+        Só os registros da página são materializados. Retorna (registros da página, total filtrado).
+        """
+        inicio = (numero - 1) * tamanho
+        with self._lock.leitura():
+            if cultura is None and data_inicio is None and data_fim is None:
+                return self._data.fatia(inicio, inicio + tamanho), len(self._data)
+
+            if data_inicio is None and data_fim is None:
+                ids = self._culturas().ids(cultura)
+            else:
+                ids = self._datas().ids(data_inicio, data_fim)
+                if cultura is not None:
+                    da_cultura = set(self._culturas().ids(cultura))
+                    ids = [id_ for id_ in ids if id_ in da_cultura]
+            return self._data.get_many(ids[inicio:inicio + tamanho]), len(ids)
+
+    def date_range(self) -> Tuple[date, date] | None:
+        """Primeira e última data de colheita registradas (ou None se não houver registros)."""
+        with self._lock.leitura():
+            return self._datas().limites()
+
+    def cultures(self) -> List[str]:
+        """Culturas distintas registradas (em minúsculas), na ordem de primeira aparição."""
+        with self._lock.leitura():
+            return self._culturas().culturas()
+
+    def culture_counts(self) -> dict:
+        """Quantidade de registros por cultura (em minúsculas)."""
+        with self._lock.leitura():
+            return self._culturas().contagens()
+
+    def load_from_json(self,
+                       path: str = "data.json",
+                       chunk_size: int = 10000,
+                       progresso: Callable[[int], None] | None = None) -> None:
+        """
+        Carrega registros de um arquivo JSON (array) ou JSON Lines, lendo-o de forma incremental.
+        Os registros são montados em blocos de `chunk_size`; `progresso`, se informado, recebe o
+        total já carregado após cada bloco. Em caso de erro os dados atuais são preservados.
+        """
         if not os.path.exists(path):
             logger.warning(f"⚠️ Arquivo '{path}' não encontrado.")
             return
 
-        with open(path, "r", encoding="utf-8") as f:
-            registros = json.load(f)
+        novo = self._novo_storage(self._data.nome)
+        for bloco in chunked(iter_json_records(path), chunk_size):
+            datas = iso_column_to_ordinals([item["data_colheita"] for item in bloco])
+            novo.extend(
+                HarvestLoss(item["id"], item["cultura"], item["area_plantada_ha"], item["prod_estimada_t"],
+                            item["prod_real_t"], ordinal, item.get("obs", ""))
+                for item, ordinal in zip(bloco, datas)
+            )
+            if progresso is not None:
+                progresso(len(novo))
+            logger.debug(f"⏳ {len(novo)} registros lidos de '{path}'...")
 
-        cls._data.clear()
-        for item in registros:
-            loss = HarvestLoss(
-                id=item["id"],
-                cultura=item["cultura"],
-                area_plantada_ha=item["area_plantada_ha"],
-                prod_estimada_t=item["prod_estimada_t"],
-                prod_real_t=item["prod_real_t"],
-                data_colheita=datetime.strptime(item["data_colheita"], "%Y-%m-%d").date(),
-                obs=item.get("obs", "")
+        with self._lock.escrita():
+            self._substituir_dados(novo, sincronizacao=None)
+        logger.info(f"✅  {len(novo)} registros carregados de '{path}'.")
+
+    def load_from_files(self, origem: str, workers: int | None = None, mesclar: bool = False) -> dict:
+        """
+        Carrega todos os arquivos JSON/JSON Lines de um diretório ou padrão glob (ex: 'fazendas/*.json'),
+        lendo e validando os arquivos em paralelo em `workers` processos (padrão: um por núcleo).
+        Registros inválidos são ignorados e registrados no log. Ids repetidos entre arquivos recebem
+        ids novos de forma determinística (ver `ingest.reassign_ids`).
+        Com `mesclar=True` os registros são somados aos atuais (e contam como alterações pendentes);
+        caso contrário substituem os dados em memória. Retorna um resumo da carga.
+        """
+        caminhos = resolve_files(origem)
+        if not caminhos:
+            logger.warning(f"⚠️ Nenhum arquivo JSON encontrado em '{origem}'.")
+            return {"arquivos": 0, "registros": 0, "invalidos": 0, "reatribuidos": 0}
+
+        inicio = time.perf_counter()
+        resultados = list(parse_files(caminhos, workers))
+
+        registros = invalidos = 0
+        for path, linhas, erros in resultados:
+            invalidos += len(erros)
+            registros += len(linhas)
+            for posicao, erro in erros[:10]:
+                logger.warning(f"⚠️ '{path}', registro {posicao} ignorado: {erro}.")
+            if len(erros) > 10:
+                logger.warning(f"⚠️ '{path}': mais {len(erros) - 10} registros inválidos ignorados.")
+
+        def _perdas(linhas: List[tuple]) -> List[HarvestLoss]:
+            return [
+                HarvestLoss(id_, cultura, area, estimada, real, ordinal, obs)
+                for id_, cultura, area, estimada, real, ordinal, obs in linhas
+            ]
+
+        if mesclar:
+            # Os ids ocupados só são conhecidos com a trava, para que nenhuma escrita os altere no meio
+            with self._lock.escrita():
+                reatribuidos = reassign_ids(resultados, set(self._data.ids()))
+                self._invalidar_indices()
+                for _, linhas, _ in resultados:
+                    perdas = _perdas(linhas)
+                    self._data.extend(perdas)
+                    for loss in perdas:
+                        self._registrar_alteracao(None, loss)
+                if self._data:
+                    self._id_counter = self._data.max_id() + 1
+        else:
+            reatribuidos = reassign_ids(resultados, set())
+            novo = self._novo_storage(self._data.nome)
+            for _, linhas, _ in resultados:
+                novo.extend(_perdas(linhas))
+            with self._lock.escrita():
+                self._substituir_dados(novo, sincronizacao=None)
+
+        segundos = time.perf_counter() - inicio
+        resumo = {
+            "arquivos": len(caminhos),
+            "registros": registros,
+            "invalidos": invalidos,
+            "reatribuidos": reatribuidos,
+            "segundos": round(segundos, 3),
+            "registros_por_segundo": round(registros / segundos) if segundos else registros,
+        }
+        logger.info(f"✅  {registros} registros carregados de {len(caminhos)} arquivos "
+                    f"({resumo['registros_por_segundo']} registros/s, {reatribuidos} ids reatribuídos, "
+                    f"{invalidos} inválidos).")
+        return resumo
+
+    def load_from_db(self, data: Iterable[tuple], chunk_size: int = 10000) -> None:
+        """
+        Carrega registros a partir de linhas do banco (ex: `Database.read_iter()`), consumindo-as
+        em blocos de `chunk_size` para não manter a lista de tuplas e a de objetos ao mesmo tempo.
+        """
+        novo = self._novo_storage(self._data.nome)
+        for bloco in chunked(data, chunk_size):
+            novo.extend(
+                HarvestLoss(
+                    id=item[0],
+                    cultura=item[1],
+                    area_plantada_ha=item[2],
+                    prod_estimada_t=item[3],
+                    prod_real_t=item[4],
+                    data_colheita=item[5],
+                    obs=item[6] if item[6] is not None else ""
+                )
+                for item in bloco
             )
-            cls._data.append(loss)
 
-        # Atualiza o _id_counter para continuar a contagem
-        if cls._data:
-            cls._id_counter = max(loss.id for loss in cls._data) + 1
+        with self._lock.escrita():
+            self._substituir_dados(novo, sincronizacao=ChangeTracker())
+        logger.info(f"✅  {len(novo)} registros carregados do banco de dados.")
 
-        cls._original_hash = cls._gerar_hash()
-        logger.info(f"✅  {len(cls._data)} registros carregados de '{path}'.")
+    def load_from_snapshot(self, path: str = "data.hls") -> None:
+        """
+        Carrega um snapshot binário (ver snapshot.py). As colunas são mapeadas direto do arquivo,
+        sem conversão registro a registro, e o backend passa a ser 'columnar'.
+        """
+        if not os.path.exists(path):
+            logger.warning(f"⚠️ Arquivo '{path}' não encontrado.")
+            return
 
-    @classmethod
-    def load_from_db(cls, data: list) -> None:
-        cls._data.clear()
+        novo = open_snapshot(path, fabrica=HarvestLoss)
+        with self._lock.escrita():
+            self._substituir_dados(novo, sincronizacao=None)
+        logger.info(f"✅  {len(novo)} registros carregados do snapshot '{path}'.")
 
-        for item in data:
-            loss = HarvestLoss(
-                id=item[0],
-                cultura=item[1],
-                area_plantada_ha=item[2],
-                prod_estimada_t=item[3],
-                prod_real_t=item[4],
-                data_colheita=item[5],
-                obs=item[6] if not None else ""
-            )
-            cls._data.append(loss)
+    def export_to_snapshot(self, path: str = "data.hls") -> int:
+        """Grava os registros em um snapshot binário e retorna a quantidade exportada."""
+        with self._lock.leitura():
+            storage = self._data
+            if not isinstance(storage, ColumnarStorage):
+                storage = ColumnarStorage(fabrica=HarvestLoss)
+                storage.extend(self._data)
 
-        # Atualiza o _id_counter para continuar a contagem
-        if cls._data:
-            cls._id_counter = max(loss.id for loss in cls._data) + 1
+            total = write_snapshot(path, storage)
+        print(f"✅ {total} registros exportados para '{path}'.")
+        return total
 
-        cls._original_hash = cls._gerar_hash()
-        logger.info(f"✅  {len(cls._data)} registros carregados do Oracle.")
+    def export_to_json(self, path: str = "data.json", json_lines: bool | None = None) -> int:
+        """
+        Exporta os registros para JSON e retorna a quantidade exportada. Com `json_lines` (padrão
+        para arquivos '.jsonl') grava JSON Lines; senão, um array com um registro por linha.
+        Os registros são codificados em lotes direto para bytes (ver serializer.py).
+        """
+        if json_lines is None:
+            json_lines = path.endswith(".jsonl")
 
-    @classmethod
-    def export_to_json(cls, path: str = "data.json") -> None:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(
-                [loss.dict for loss in cls._data],
-                f,
-                indent=4,
-                ensure_ascii=False
-            )
-        print(f"✅ {len(cls._data)} registros exportados para '{path}'.")
+        with self._lock.leitura():
+            total = write_records(path, self._data, json_lines)
+        print(f"✅ {total} registros exportados para '{path}'.")
+        return total
 
-    @classmethod
-    def export_to_db(cls, db_instance: Database) -> None:
-        if not cls._data:
+    def open_journaled(self, path: str = "data.json") -> None:
+        """
+        Carrega o arquivo base e reaplica o diário '<path>.journal' por cima. A partir daí as
+        alterações são registradas no diário e `save_json` grava apenas o que mudou.
+        """
+        with self._lock.escrita():
+            diario = Journal(path)
+            self.load_from_json(path)
+
+            aplicadas = 0
+            for entrada in iter_journal(path):
+                # Reaplicar é idempotente: o diário pode repetir o que já foi compactado no arquivo base
+                if entrada["op"] == DELETE:
+                    if self._data.remove(entrada["id"]) is None:
+                        continue
+                else:
+                    loss = HarvestLoss.from_dict(entrada["registro"])
+                    existente = self._data.get(loss.id)
+                    if existente == loss:
+                        continue
+                    if existente is not None:
+                        self._data.remove(loss.id)
+                    self._data.append(loss)
+                aplicadas += 1
+
+            if aplicadas:
+                self._id_counter = self._data.max_id() + 1 if self._data else 1
+                self._invalidar_indices()
+                logger.info(f"🧾 {aplicadas} alterações reaplicadas a partir de '{diario.path}'.")
+
+            self._diario = diario
+
+    def save_json(self, path: str = "data.json", compactar_apos: int = 1000) -> int:
+        """
+        Salva em `path`. Com o diário ativo para esse arquivo, grava só as alterações pendentes e,
+        quando o diário passa de `compactar_apos` entradas, o compacta no arquivo base.
+        O estado salvo passa a ser a referência de `updated()`.
+        Retorna a quantidade de entradas gravadas (ou de registros, na gravação completa).
+        """
+        with self._lock.escrita():
+            diario = self._diario
+            if diario is None or diario.base != path:
+                total = self.export_to_json(path)
+                self._diario = Journal(path)
+                self._diario.truncar()
+                self._alteracoes.reiniciar()
+                return total
+
+            if diario.entradas + diario.pendentes >= compactar_apos:
+                self.compact_journal()
+                return len(self._data)
+
+            total = diario.gravar()
+            self._alteracoes.reiniciar()
+        print(f"✅ {total} alterações gravadas em '{diario.path}'.")
+        return total
+
+    def compact_journal(self) -> None:
+        """Reescreve o arquivo base com o estado atual (de forma atômica) e esvazia o diário."""
+        with self._lock.escrita():
+            if self._diario is None:
+                return
+            self.export_to_json(self._diario.base)
+            self._diario.truncar()
+            self._alteracoes.reiniciar()
+        logger.info(f"🧾 Diário compactado em '{self._diario.base}'.")
+
+    def export_to_db(self, db_instance: BaseDatabase, batch_size: int = 1000) -> Tuple[int, int]:
+        """
+        Exporta os registros em lotes de `batch_size`; duplicados já existentes no banco são ignorados.
+        Retorna (sucesso, falhas).
+        """
+        inseridos, duplicados, falhas = self._exportar(db_instance, batch_size)
+        return inseridos + duplicados, falhas
+
+    def _exportar(self, db_instance: BaseDatabase, batch_size: int) -> Tuple[int, int, int]:
+        """Exportação completa de `export_to_db`. Retorna (inseridos, duplicados ignorados, falhas)."""
+        perdas = self.all()
+        if not perdas:
             print("⚠️ Nenhum dado em memória para exportar.")
-            return
+            return 0, 0, 0
+
+        linhas = [
+            (perda.cultura, perda.area_plantada_ha, perda.prod_estimada_t, perda.prod_real_t,
+             perda.data_colheita, perda.obs)
+            for perda in perdas
+        ]
+        inseridos, duplicados, falhas = db_instance.create_many(linhas, batch_size=batch_size)
 
-        sucesso = 0
-        falha = 0
+        for posicao, erro in falhas:
+            print(f"❌ Falha ao exportar ID {perdas[posicao].id}: {erro}")
+
+        print(f"✅ Exportação finalizada. Sucesso: {inseridos + duplicados} | Falhas: {len(falhas)}")
+        return inseridos, duplicados, len(falhas)
+
+    def pending_db_changes(self) -> Tuple[List[HarvestLoss], List[HarvestLoss], List[int]]:
+        """
+        Alterações ainda não enviadas ao banco, por id: (inserir, atualizar, remover).
+        O custo é proporcional à quantidade de registros alterados, não ao total em memória.
+        """
+        inserir, atualizar, remover = [], [], []
+        with self._lock.leitura():
+            if self._sincronizacao is None:
+                return inserir, atualizar, remover
+
+            for id_ in sorted(self._sincronizacao.alterados()):
+                original = self._sincronizacao.original(id_)
+                atual = self._data.get(id_)
+                if atual is None:
+                    remover.append(id_)
+                elif original is None:
+                    inserir.append(atual)
+                else:
+                    atualizar.append(atual)
+        return inserir, atualizar, remover
+
+    def sync_to_db(self, db_instance: BaseDatabase, batch_size: int = 1000) -> Tuple[int, int, int] | None:
+        """
+        Envia ao banco só o que mudou desde a última carga (ou sincronização) a partir dele, com
+        INSERT/UPDATE/DELETE em lotes numa única transação. Retorna (inseridos, atualizados, removidos),
+        ou None se a sincronização falhar (nesse caso as alterações continuam pendentes).
+        Os registros novos recebem o id gerado pelo banco (outros clientes podem ter inserido linhas
+        desde a carga), que passa a valer também em memória.
+        Se os dados não foram carregados do banco, não há base para comparar e é feita a exportação completa:
+        duplicados já existentes no banco não contam como inseridos, e qualquer falha retorna None.
+        A trava de escrita fica com a sincronização até o fim, para nenhuma alteração se perder no meio.
+        """
+        with self._lock.escrita():
+            if self._sincronizacao is None:
+                print("⚠️ Dados não carregados do banco: exportando todos os registros.")
+                inseridos, _, falhas = self._exportar(db_instance, batch_size)
+                if falhas:
+                    logger.error(f"Exportação completa para o banco com {falhas} falhas.")
+                    return None
+                return inseridos, 0, 0
+
+            inserir, atualizar, remover = self.pending_db_changes()
+            if not (inserir or atualizar or remover):
+                print("✅ Banco de dados já está sincronizado.")
+                return 0, 0, 0
+
+            def _linha(perda: HarvestLoss) -> tuple:
+                return (perda.cultura, perda.area_plantada_ha, perda.prod_estimada_t, perda.prod_real_t,
+                        perda.data_colheita, perda.obs)
 
-        for perda in cls._data:
             try:
-                db_instance.create(
-                    cultura=perda.cultura,
-                    area=perda.area_plantada_ha,
-                    estimada=perda.prod_estimada_t,
-                    real=perda.prod_real_t,
-                    data_colheita=perda.data_colheita,
-                    obs=perda.obs
+                novos_ids, atualizados, removidos = db_instance.apply_changes(
+                    [_linha(p) for p in inserir],
+                    [(p.id, *_linha(p)) for p in atualizar],
+                    remover,
+                    batch_size=batch_size
                 )
-                sucesso += 1
             except Exception as e:
-                print(f"❌ Falha ao exportar ID {perda.id}: {e}")
-                falha += 1
+                logger.error(f"Erro ao sincronizar com o banco: {e}")
+                print("❌ Falha na sincronização; nenhuma alteração foi gravada no banco.")
+                return None
 
-        print(f"✅ Exportação finalizada. Sucesso: {sucesso} | Falhas: {falha}")
+            self._adotar_ids(inserir, novos_ids)
+            self._sincronizacao.reiniciar()
+            print(f"✅ Sincronização finalizada. Inseridos: {len(novos_ids)} | Atualizados: {atualizados} | "
+                  f"Removidos: {removidos}")
+            return len(novos_ids), atualizados, removidos
 
-    @classmethod
-    def get_statistics(cls, path: str = "perdas_por_cultura.png") -> None | str:
-        if not cls._data:
+    def _adotar_ids(self, inseridos: List[HarvestLoss], novos_ids: List[int]) -> None:
+        """
+        Troca os ids provisórios dos registros inseridos no banco pelos gerados por ele (chamado com a
+        trava de escrita). Todos saem antes de voltarem, para um id novo não colidir com um provisório.
+        """
+        trocas = [(perda, novo_id) for perda, novo_id in zip(inseridos, novos_ids) if perda.id != novo_id]
+        for perda, _ in trocas:
+            self._data.remove(perda.id)
+            self._registrar_alteracao(perda, None)
+        for perda, novo_id in trocas:
+            renumerada = HarvestLoss(novo_id, perda.cultura, perda.area_plantada_ha, perda.prod_estimada_t,
+                                     perda.prod_real_t, perda.data_ordinal, perda.obs)
+            self._data.append(renumerada)
+            self._registrar_alteracao(None, renumerada)
+        if novos_ids:
+            self._id_counter = max(self._id_counter, max(novos_ids) + 1)
+
+    def culture_statistics(self) -> Dict[str, CultureStats]:
+        """
+        Agregados por cultura (em minúsculas), mantidos incrementalmente: custo O(culturas).
+        Devolve cópias, que não mudam com escritas posteriores.
+        """
+        with self._lock.leitura():
+            agregados = self._agregados()
+            with self._lock_indices:
+                return {cultura: copy(stats) for cultura, stats in agregados.estatisticas().items()}
+
+    @staticmethod
+    def db_statistics(db_instance: BaseDatabase,
+                      cultura: str | None = None,
+                      data_inicio: date | None = None,
+                      data_fim: date | None = None) -> Dict[str, CultureStats]:
+        """
+        Mesmos agregados de `culture_statistics`, calculados pelo banco (GROUP BY no servidor) sem
+        carregar os registros em memória. Aceita filtro por cultura e intervalo de datas.
+        """
+        return {
+            nome: CultureStats(*agregado)
+            for nome, agregado in db_instance.aggregate_by_culture(cultura, data_inicio, data_fim).items()
+        }
+
+    def filtered_statistics(self,
+                            cultura: str | None = None,
+                            data_inicio: date | None = None,
+                            data_fim: date | None = None) -> Dict[str, CultureStats]:
+        """
+        Agregados de `culture_statistics` restritos a uma cultura e/ou a um intervalo de datas.
+        Só por cultura o resultado sai dos agregados incrementais; com datas, é calculado a partir
+        do índice de datas, percorrendo apenas os registros do intervalo.
+        """
+        chave = cultura.lower() if cultura is not None else None
+        if data_inicio is None and data_fim is None:
+            estatisticas = self.culture_statistics()
+            return estatisticas if chave is None else {c: s for c, s in estatisticas.items() if c == chave}
+
+        estatisticas = {}
+        for loss in self.filter_by_date(data_inicio, data_fim):
+            cultura_loss = loss.cultura.lower()
+            if chave is None or cultura_loss == chave:
+                estatisticas.setdefault(cultura_loss, CultureStats()).acumular(loss)
+        return estatisticas
+
+    def _estatisticas(self,
+                      db_instance: BaseDatabase | None,
+                      cultura: str | None = None,
+                      data_inicio: date | None = None,
+                      data_fim: date | None = None) -> Dict[str, CultureStats]:
+        if db_instance is not None:
+            return self.db_statistics(db_instance, cultura, data_inicio, data_fim)
+        return self.filtered_statistics(cultura, data_inicio, data_fim)
+
+    def statistics_by_period(self,
+                             periodo: str = "ano",
+                             cultura: str | None = None,
+                             data_inicio: date | None = None,
+                             data_fim: date | None = None,
+                             inicio_safra: int = 7) -> Dict[str, CultureStats]:
+        """
+        Agregados de perda por período ('ano', 'mes' ou 'safra'), em ordem cronológica, com os mesmos
+        cálculos de `culture_statistics`. Aceita filtro por cultura e intervalo de datas.
+        """
+        if periodo not in PERIODOS:
+            raise ValueError(f"Período inválido: {periodo}. Use {', '.join(PERIODOS)}.")
+
+        estatisticas: Dict[str, CultureStats] = {}
+        cultura = cultura.lower() if cultura is not None else None
+        for loss in self.filter_by_date(data_inicio, data_fim):
+            if cultura is not None and loss.cultura.lower() != cultura:
+                continue
+            chave = chave_periodo(loss.data_colheita, periodo, inicio_safra)
+            estatisticas.setdefault(chave, CultureStats()).acumular(loss)
+        return estatisticas
+
+    def statistics_summary(self,
+                           db_instance: BaseDatabase | None = None,
+                           cultura: str | None = None,
+                           data_inicio: date | None = None,
+                           data_fim: date | None = None) -> dict:
+        """
+        Resumo das estatísticas gerais e por cultura, em formato serializável, opcionalmente
+        filtrado por cultura e intervalo de datas. Com `db_instance` os agregados vêm direto do
+        banco (ver `db_statistics`).
+        """
+        return self._resumir(self._estatisticas(db_instance, cultura, data_inicio, data_fim))
+
+    @staticmethod
+    def _resumir(estatisticas: Dict[str, CultureStats]) -> dict:
+        if not estatisticas:
+            return {"total_registros": 0, "culturas": {}}
+
+        perdas_medias = {cultura: stats.perda_media for cultura, stats in estatisticas.items()}
+        return {
+            "total_registros": sum(stats.registros for stats in estatisticas.values()),
+            "media_geral": round(sum(perdas_medias.values()) / len(perdas_medias), 2),
+            "media_ponderada": percentual_perda(
+                sum(stats.prod_estimada_t for stats in estatisticas.values()),
+                sum(stats.prod_real_t for stats in estatisticas.values())
+            ),
+            "cultura_maior_perda": max(perdas_medias, key=perdas_medias.get),
+            "cultura_menor_perda": min(perdas_medias, key=perdas_medias.get),
+            "culturas": {cultura: stats.dict for cultura, stats in estatisticas.items()},
+        }
+
+    def get_statistics(self,
+                       path: str = "perdas_por_cultura.png",
+                       aguardar_grafico: bool = True,
+                       db_instance: BaseDatabase | None = None) -> None | str | Future:
+        """
+        Imprime as estatísticas e gera o gráfico (reaproveitado do disco se os valores não mudaram).
+        Com `aguardar_grafico=False` o gráfico é renderizado em segundo plano e o retorno é um
+        Future com o caminho da imagem. Com `db_instance` as estatísticas são calculadas no banco.
+        """
+        estatisticas = self._estatisticas(db_instance)
+        if not estatisticas:
             print("⚠️  Nenhuma perda registrada para análise.")
             return None
 
-        perdas_por_cultura = defaultdict(list)
-        for perda in cls._data:
-            perda_percentual = round((perda.prod_estimada_t - perda.prod_real_t) / perda.prod_estimada_t * 100, 2)
-            perdas_por_cultura[perda.cultura.lower()].append(perda_percentual)
+        return self._exibir_estatisticas(estatisticas, path, aguardar_grafico)
+
+    def save_chart(self, path: str = "perdas_por_cultura.png", db_instance: BaseDatabase | None = None) -> None | str:
+        """Gera apenas o gráfico de perda média por cultura, sem imprimir as estatísticas."""
+        estatisticas = self._estatisticas(db_instance)
+        if not estatisticas:
+            return None
 
-        culturas = list(perdas_por_cultura.keys())
-        perdas_medias = [round(sum(valores) / len(valores), 2) for valores in perdas_por_cultura.values()]
+        return render_chart(list(estatisticas), [stats.perda_media for stats in estatisticas.values()], path)
 
-        # Estatísticas gerais
-        total_registros = len(cls._data)
-        media_geral = round(sum(perdas_medias) / len(perdas_medias), 2)
-        cultura_mais = culturas[perdas_medias.index(max(perdas_medias))]
-        cultura_menos = culturas[perdas_medias.index(min(perdas_medias))]
+    def _exibir_estatisticas(self,
+                             estatisticas: Dict[str, CultureStats],
+                             path: str,
+                             aguardar_grafico: bool = True) -> str | Future:
+        resumo = self._resumir(estatisticas)
+        culturas = resumo["culturas"]
+        cultura_mais = resumo["cultura_maior_perda"]
+        cultura_menos = resumo["cultura_menor_perda"]
 
         print("\n📊 Estatísticas gerais:")
-        print(f"📋 Total de registros: {total_registros}")
-        print(f"📉 Média geral de perdas: {media_geral}%")
-        print(f"🔺 Cultura com maior perda média: {cultura_mais} ({max(perdas_medias)}%)")
-        print(f"🔻 Cultura com menor perda média: {cultura_menos} ({min(perdas_medias)}%)")
-
-        # Gráfico de barras
-        plt.figure(figsize=(10, 6))
-        plt.bar(culturas, perdas_medias)
-        plt.title("Perda Média por Cultura (%)")
-        plt.xlabel("Cultura")
-        plt.ylabel("Perda Média (%)")
-        plt.grid(True, linestyle="--", alpha=0.5)
-        plt.tight_layout()
-        plt.savefig(path)
+        print(f"📋 Total de registros: {resumo['total_registros']}")
+        print(f"📉 Média geral de perdas: {resumo['media_geral']}%")
+        print(f"⚖️  Média geral ponderada (por toneladas): {resumo['media_ponderada']}%")
+        print(f"🔺 Cultura com maior perda média: {cultura_mais} ({culturas[cultura_mais]['perda_media']}%)")
+        print(f"🔻 Cultura com menor perda média: {cultura_menos} ({culturas[cultura_menos]['perda_media']}%)")
+
+        print("\n🌾 Por cultura:")
+        for cultura, stats in estatisticas.items():
+            print(f"   {cultura}: {stats.registros} registros | média {stats.perda_media}% | "
+                  f"ponderada {stats.perda_media_ponderada}% | "
+                  f"mín {stats.perda_minima}% | máx {stats.perda_maxima}%")
+
+        futuro = render_chart_async(list(culturas), [c["perda_media"] for c in culturas.values()], path)
+        if not aguardar_grafico:
+            return futuro
+
+        futuro.result()
         print(f"\n📈 Gráfico salvo em: {path}")
         return path
@@ -1,96 +1,741 @@
-import oracledb
-from dotenv import load_dotenv
 from logger_config import logger
 from datetime import date
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+from abc import ABC, abstractmethod
+import atexit
 import os
+import sqlite3
+import threading
 
+from dates import parse_iso_date
+from storage import Agregado
 
-class Database:
-    def __init__(self):
+# (cultura, area_plantada_ha, prod_estimada_t, prod_real_t, data_colheita, obs)
+Linha = Tuple[str, float, float, float, date, str]
+
+# (inseridos, duplicados ignorados, [(posição na entrada, mensagem de erro)])
+ResultadoLote = Tuple[int, int, List[Tuple[int, str]]]
+
+# (id, cultura, area_plantada_ha, prod_estimada_t, prod_real_t, data_colheita, obs)
+LinhaComId = Tuple[int, str, float, float, float, date, str]
+
+# (ids gerados pelo banco para as linhas inseridas, na ordem recebida; atualizados; removidos)
+ResultadoSincronizacao = Tuple[List[int], int, int]
+
+COLUNAS = ("id", "cultura", "area_plantada_ha", "prod_estimada_t", "prod_real_t", "data_colheita", "obs")
+
+
+def _filtros(cultura: str | None,
+             data_inicio: date | None,
+             data_fim: date | None) -> Tuple[str, dict]:
+    """Cláusula WHERE (ou string vazia) e parâmetros para os filtros de cultura e datas."""
+    condicoes = []
+    parametros = {}
+    if cultura is not None:
+        condicoes.append("LOWER(cultura) = LOWER(:cultura)")
+        parametros["cultura"] = cultura
+    if data_inicio is not None:
+        condicoes.append("data_colheita >= :data_inicio")
+        parametros["data_inicio"] = data_inicio
+    if data_fim is not None:
+        condicoes.append("data_colheita <= :data_fim")
+        parametros["data_fim"] = data_fim
+    return (" WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+
+def montar_consulta(colunas: Sequence[str] | None = None,
+                    cultura: str | None = None,
+                    data_inicio: date | None = None,
+                    data_fim: date | None = None,
+                    offset: int | None = None,
+                    limite: int | None = None,
+                    dialeto: str = "oracle") -> Tuple[str, dict]:
+    """
+    Monta o SELECT em harvest_loss com projeção de colunas e filtros opcionais
+    (cultura sem diferenciar maiúsculas e intervalo fechado de datas). Retorna (sql, parâmetros).
+    Com `limite` só uma página é lida: OFFSET/FETCH no Oracle ou LIMIT/OFFSET no SQLite.
+    """
+    colunas = list(colunas or COLUNAS)
+    invalidas = [c for c in colunas if c not in COLUNAS]
+    if invalidas:
+        raise ValueError(f"Colunas inválidas: {', '.join(invalidas)}")
+
+    where, parametros = _filtros(cultura, data_inicio, data_fim)
+    sql = f"SELECT {', '.join(colunas)} FROM harvest_loss{where} ORDER BY id"
+    if limite is not None:
+        parametros.update(offset=offset or 0, limite=limite)
+        if dialeto == "sqlite":
+            sql += " LIMIT :limite OFFSET :offset"
+        else:
+            sql += " OFFSET :offset ROWS FETCH NEXT :limite ROWS ONLY"
+    return sql, parametros
+
+
+def montar_contagem(cultura: str | None = None,
+                    data_inicio: date | None = None,
+                    data_fim: date | None = None) -> Tuple[str, dict]:
+    where, parametros = _filtros(cultura, data_inicio, data_fim)
+    return f"SELECT COUNT(*) FROM harvest_loss{where}", parametros
+
+
+_PERCENTUAL = "ROUND((prod_estimada_t - prod_real_t) / prod_estimada_t * 100, 2)"
+
+
+def montar_agregacao(cultura: str | None = None,
+                     data_inicio: date | None = None,
+                     data_fim: date | None = None) -> Tuple[str, dict]:
+    """
+    Monta o GROUP BY por cultura que calcula no servidor os mesmos agregados de
+    `storage.Agregado`: (cultura, quantidade, soma dos percentuais, soma estimada, soma real,
+    menor percentual, maior percentual), na ordem de primeira aparição (menor id).
+    """
+    where, parametros = _filtros(cultura, data_inicio, data_fim)
+    sql = (f"SELECT LOWER(cultura), COUNT(*), SUM({_PERCENTUAL}), SUM(prod_estimada_t), SUM(prod_real_t), "
+           f"MIN({_PERCENTUAL}), MAX({_PERCENTUAL}) "
+           f"FROM harvest_loss{where} GROUP BY LOWER(cultura) ORDER BY MIN(id)")
+    return sql, parametros
+
+
+def _agrupar_agregados(linhas: Iterable[tuple]) -> Dict[str, Agregado]:
+    """
+    Converte as linhas de `montar_agregacao` em {cultura: Agregado}. O LOWER do banco pode não
+    tratar acentos (ex: SQLite), então os grupos são reagrupados com `str.lower` do Python.
+    """
+    agregados: Dict[str, Agregado] = {}
+    for cultura, *valores in linhas:
+        qtd, soma_pct, soma_est, soma_real, minimo, maximo = (
+            int(valores[0]), *(float(v) for v in valores[1:])
+        )
+        chave = cultura.lower()
+        anterior = agregados.get(chave)
+        if anterior is not None:
+            qtd, soma_pct, soma_est, soma_real = (qtd + anterior[0], soma_pct + anterior[1],
+                                                  soma_est + anterior[2], soma_real + anterior[3])
+            minimo, maximo = min(minimo, anterior[4]), max(maximo, anterior[5])
+        agregados[chave] = (qtd, soma_pct, soma_est, soma_real, minimo, maximo)
+    return agregados
+
+
+def _binds(cultura: str, area: float, estimada: float, real: float, data_colheita: date, obs: str) -> dict:
+    """
+    Parâmetros nomeados de uma linha, com os mesmos nomes nos comandos do Oracle e do SQLite.
+    O python-oracledb associa uma sequência pela ordem dos marcadores no SQL (não pelo número
+    em ':1', ':2'...), então comandos que repetem ou reordenam colunas precisam de nomes.
+    """
+    return {
+        "cultura": cultura,
+        "area": area,
+        "estimada": estimada,
+        "real": real,
+        "data": data_colheita,
+        "obs": obs or None,
+    }
+
+
+def _binds_com_id(linhas: Sequence[LinhaComId]) -> List[dict]:
+    return [{"id": linha[0], **_binds(*linha[1:])} for linha in linhas]
+
+
+def _lotes(itens: Sequence, tamanho: int) -> Iterator[list]:
+    for inicio in range(0, len(itens), tamanho):
+        yield list(itens[inicio:inicio + tamanho])
+
+
+_POOLS: Dict[Tuple[str, str], "oracledb.ConnectionPool"] = {}
+_TABELAS_VERIFICADAS: Set[Tuple[str, str]] = set()
+# Protege _POOLS e _TABELAS_VERIFICADAS: sem ela duas threads poderiam criar dois pools para a mesma chave
+_POOLS_LOCK = threading.Lock()
+
+
+def close_pools() -> None:
+    """Fecha todos os pools de conexão Oracle abertos pelo processo (registrada no atexit)."""
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            try:
+                pool.close(force=True)
+            except Exception as e:
+                logger.warning(f"Erro ao encerrar pool de conexões: {e}")
+        _POOLS.clear()
+        _TABELAS_VERIFICADAS.clear()
+
+
+atexit.register(close_pools)
+
+
+class BaseDatabase(ABC):
+    """Interface comum aos backends de banco usados pelo HarvestReport."""
+
+    @abstractmethod
+    def create(self, cultura: str, area: float, estimada: float, real: float, data_colheita: date,
+               obs: str = "") -> None:
+        ...
+
+    @abstractmethod
+    def create_many(self, linhas: Sequence[Linha], batch_size: int = 1000) -> ResultadoLote:
+        ...
+
+    @abstractmethod
+    def read_iter(self,
+                  colunas: Sequence[str] | None = None,
+                  cultura: str | None = None,
+                  data_inicio: date | None = None,
+                  data_fim: date | None = None,
+                  arraysize: int = 1000,
+                  prefetchrows: int | None = None) -> Iterator[tuple]:
+        ...
+
+    @abstractmethod
+    def read_page(self,
+                  offset: int,
+                  limite: int,
+                  colunas: Sequence[str] | None = None,
+                  cultura: str | None = None,
+                  data_inicio: date | None = None,
+                  data_fim: date | None = None) -> List[tuple]:
+        """Lê só as linhas [offset, offset + limite) da consulta, em ordem de id."""
+        ...
+
+    @abstractmethod
+    def count(self,
+              cultura: str | None = None,
+              data_inicio: date | None = None,
+              data_fim: date | None = None) -> int:
+        ...
+
+    @abstractmethod
+    def aggregate_by_culture(self,
+                             cultura: str | None = None,
+                             data_inicio: date | None = None,
+                             data_fim: date | None = None) -> Dict[str, Agregado]:
+        """
+        Agregados de perda por cultura (em minúsculas) calculados no servidor com GROUP BY:
+        só uma linha por cultura trafega, em vez da tabela inteira.
+        """
+        ...
+
+    @abstractmethod
+    def apply_changes(self,
+                      inserir: Sequence[Linha],
+                      atualizar: Sequence[LinhaComId],
+                      remover: Sequence[int],
+                      batch_size: int = 1000) -> ResultadoSincronizacao:
+        """
+        Aplica um conjunto de alterações (INSERT, UPDATE e DELETE por id, em lotes) em uma única
+        transação: ou tudo é gravado, ou nada é. As linhas novas são inseridas sem id, que é gerado
+        pelo banco. Retorna (ids gerados para `inserir`, na mesma ordem, atualizados, removidos).
+        """
+        ...
+
+    @abstractmethod
+    def update(self, id_: int, campo: str, novo_valor) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, id_: int) -> None:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    def read(self) -> list:
         try:
+            rows = list(self.read_iter())
+            logger.info(f"🔍 {len(rows)} registros recuperados do banco.")
+            return rows
+        except Exception as e:
+            logger.error(f"Erro ao buscar dados: {e}")
+            return []
+
+
+class Database(BaseDatabase):
+    """
+    Backend Oracle. As conexões vêm de um pool compartilhado por usuário/DSN e são
+    obtidas e devolvidas a cada operação; a tabela é verificada uma única vez por pool
+    (`verificar_tabela=False` pula a verificação, ex: num teste de conexão).
+    """
+
+    def __init__(self, pool_min: int = 1, pool_max: int = 4, pool_increment: int = 1, verificar_tabela: bool = True):
+        try:
+            # Importados aqui para que quem não usa o Oracle não pague o custo de carregá-los
+            import oracledb
+            from dotenv import load_dotenv
             load_dotenv()
 
-            self.conn = oracledb.connect(
-                user=os.getenv("ORACLE_USER"),
-                password=os.getenv("ORACLE_PASSWORD"),
-                dsn=f"{os.getenv("ORACLE_HOST")}:{os.getenv("ORACLE_PORT", "1521")}/{os.getenv("ORACLE_SERVICE")}"
-            )
-            self.cursor = self.conn.cursor()
-            logger.info("✅ Conectado ao banco de dados Oracle.")
+            user = os.getenv("ORACLE_USER")
+            dsn = f"{os.getenv('ORACLE_HOST')}:{os.getenv('ORACLE_PORT', '1521')}/{os.getenv('ORACLE_SERVICE')}"
+            self._chave = (user, dsn)
 
-            try:
-                self.cursor.execute("""
-                                    SELECT table_name
-                                    FROM user_tables
-                                    WHERE table_name = 'HARVEST_LOSS'
-                                    """)
-                tabela = self.cursor.fetchone()
+            with _POOLS_LOCK:
+                self.pool = _POOLS.get(self._chave)
+                if self.pool is None:
+                    pool = oracledb.create_pool(
+                        user=user,
+                        password=os.getenv("ORACLE_PASSWORD"),
+                        dsn=dsn,
+                        min=pool_min,
+                        max=pool_max,
+                        increment=pool_increment
+                    )
+                    try:
+                        # A primeira conexão valida as credenciais antes de publicar o pool
+                        with pool.acquire() as conn:
+                            conn.ping()
+                    except Exception:
+                        pool.close(force=True)
+                        raise
+                    _POOLS[self._chave] = self.pool = pool
+                    logger.info("✅ Conectado ao banco de dados Oracle.")
+
+                # Só marca como verificada se a verificação deu certo; senão a próxima instância tenta de novo
+                if verificar_tabela and self._chave not in _TABELAS_VERIFICADAS and self._verificar_tabela():
+                    _TABELAS_VERIFICADAS.add(self._chave)
+
+        except Exception as e:
+            logger.error(f"Erro ao conectar ao banco de dados: {e}")
+            raise
+
+    def _verificar_tabela(self) -> bool:
+        """Verifica se a tabela existe e a cria se preciso. Retorna False se a verificação falhar."""
+        try:
+            with self.pool.acquire() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                               SELECT table_name
+                               FROM user_tables
+                               WHERE table_name = 'HARVEST_LOSS'
+                               """)
+                tabela = cursor.fetchone()
 
                 if tabela is None:
                     logger.warning("⚠️ Tabela 'harvest_loss' não encontrada. Criando agora...")
-                    self.cursor.execute("""
-                                        CREATE TABLE harvest_loss
-                                        (
-                                            id               NUMBER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-                                            cultura          VARCHAR2(100) NOT NULL,
-                                            area_plantada_ha FLOAT NOT NULL,
-                                            prod_estimada_t  FLOAT NOT NULL,
-                                            prod_real_t      FLOAT NOT NULL,
-                                            data_colheita    DATE  NOT NULL,
-                                            obs              VARCHAR2(255)
-                                        )
-                                        """)
-                    self.conn.commit()
+                    cursor.execute("""
+                                   CREATE TABLE harvest_loss
+                                   (
+                                       id               NUMBER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                                       cultura          VARCHAR2(100) NOT NULL,
+                                       area_plantada_ha FLOAT NOT NULL,
+                                       prod_estimada_t  FLOAT NOT NULL,
+                                       prod_real_t      FLOAT NOT NULL,
+                                       data_colheita    DATE  NOT NULL,
+                                       obs              VARCHAR2(255)
+                                   )
+                                   """)
+                    cursor.execute("CREATE INDEX harvest_loss_dup_ix ON harvest_loss (cultura, data_colheita)")
+                    conn.commit()
                     logger.info("✅ Tabela 'harvest_loss' criada com sucesso.")
                 else:
                     logger.info("📦 Tabela 'harvest_loss' já existe.")
-            except Exception as e:
-                logger.error(f"Erro ao verificar ou criar tabela: {e}")
-
+            return True
         except Exception as e:
-            logger.error(f"Erro ao conectar ao banco de dados: {e}")
-            raise
+            logger.error(f"Erro ao verificar ou criar tabela: {e}")
+            return False
+
+    def ping(self) -> bool:
+        """Verifica se o banco responde usando uma conexão do pool."""
+        with self.pool.acquire() as conn:
+            conn.ping()
+        return True
 
     def create(self, cultura: str, area: float, estimada: float, real: float, data_colheita: date,
                obs: str = "") -> None:
         try:
-            self.cursor.execute("""
-                                SELECT COUNT(*)
-                                FROM harvest_loss
-                                WHERE cultura = :1 AND area_plantada_ha = :2 AND prod_estimada_t = :3
-                  AND prod_real_t = :4 AND data_colheita = :5 AND NVL(obs, 'NULL') = NVL(:6, 'NULL')
-                                """, [cultura, area, estimada, real, data_colheita, obs])
-            existe = self.cursor.fetchone()[0]
-
-            if existe:
-                logger.warning("⚠️ Registro já existe. Ignorando inserção duplicada.")
-                return
+            with self.pool.acquire() as conn:
+                cursor = conn.cursor()
+                parametros = _binds(cultura, area, estimada, real, data_colheita, obs)
+                cursor.execute("""
+                               SELECT COUNT(*)
+                               FROM harvest_loss
+                               WHERE cultura = :cultura AND area_plantada_ha = :area AND prod_estimada_t = :estimada
+                  AND prod_real_t = :real AND data_colheita = :data AND NVL(obs, 'NULL') = NVL(:obs, 'NULL')
+                               """, parametros)
+                existe = cursor.fetchone()[0]
+
+                if existe:
+                    logger.warning("⚠️ Registro já existe. Ignorando inserção duplicada.")
+                    return
+
+                cursor.execute("""
+                               INSERT INTO harvest_loss (cultura, area_plantada_ha, prod_estimada_t, prod_real_t,
+                                                         data_colheita, obs)
+                               VALUES (:cultura, :area, :estimada, :real, :data, :obs)
+                               """, parametros)
+                conn.commit()
+                logger.info("📦 Perda agrícola inserida com sucesso no banco.")
+
+        except Exception as e:
+            logger.error(f"Erro ao inserir no banco: {e}")
+
+    def create_many(self, linhas: Sequence[Linha], batch_size: int = 1000) -> ResultadoLote:
+        """
+        Insere vários registros em lotes com `executemany`, ignorando duplicados no próprio
+        servidor via MERGE. Faz um commit por lote e retorna (inseridos, duplicados, falhas).
+        """
+        inseridos = 0
+        falhas: List[Tuple[int, str]] = []
+
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            for inicio in range(0, len(linhas), batch_size):
+                lote = list(linhas[inicio:inicio + batch_size])
+                try:
+                    cursor.executemany("""
+                        MERGE INTO harvest_loss t
+                        USING (SELECT :cultura AS cultura, :area AS area_plantada_ha, :estimada AS prod_estimada_t,
+                                      :real AS prod_real_t, :data AS data_colheita, :obs AS obs
+                               FROM dual) s
+                        ON (t.cultura = s.cultura AND t.area_plantada_ha = s.area_plantada_ha
+                            AND t.prod_estimada_t = s.prod_estimada_t AND t.prod_real_t = s.prod_real_t
+                            AND t.data_colheita = s.data_colheita AND NVL(t.obs, 'NULL') = NVL(s.obs, 'NULL'))
+                        WHEN NOT MATCHED THEN
+                            INSERT (cultura, area_plantada_ha, prod_estimada_t, prod_real_t, data_colheita, obs)
+                            VALUES (s.cultura, s.area_plantada_ha, s.prod_estimada_t, s.prod_real_t,
+                                    s.data_colheita, s.obs)
+                    """, [_binds(*linha) for linha in lote], batcherrors=True, arraydmlrowcounts=True)
 
+                    erros = cursor.getbatcherrors()
+                    inseridos += sum(cursor.getarraydmlrowcounts())
+                    falhas.extend((inicio + erro.offset, erro.message) for erro in erros)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Erro ao inserir lote no banco: {e}")
+                    falhas.extend((inicio + i, str(e)) for i in range(len(lote)))
+
+        duplicados = len(linhas) - inseridos - len(falhas)
+        logger.info(f"📦 {inseridos} perdas inseridas em lote ({duplicados} duplicadas ignoradas).")
+        return inseridos, duplicados, falhas
+
+    def read_iter(self,
+                  colunas: Sequence[str] | None = None,
+                  cultura: str | None = None,
+                  data_inicio: date | None = None,
+                  data_fim: date | None = None,
+                  arraysize: int = 1000,
+                  prefetchrows: int | None = None) -> Iterator[tuple]:
+        """
+        Lê os registros de forma incremental, buscando `arraysize` linhas por ida ao servidor.
+        Aceita projeção de colunas e filtros por cultura e intervalo de datas (ver `montar_consulta`).
+        A conexão do pool fica reservada até o gerador ser consumido ou fechado.
+        """
+        sql, parametros = montar_consulta(colunas, cultura, data_inicio, data_fim)
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.arraysize = arraysize
+                cursor.prefetchrows = prefetchrows if prefetchrows is not None else arraysize + 1
+                cursor.execute(sql, parametros)
+                while True:
+                    lote = cursor.fetchmany()
+                    if not lote:
+                        break
+                    yield from lote
+            finally:
+                cursor.close()
+
+    def read_page(self,
+                  offset: int,
+                  limite: int,
+                  colunas: Sequence[str] | None = None,
+                  cultura: str | None = None,
+                  data_inicio: date | None = None,
+                  data_fim: date | None = None) -> List[tuple]:
+        sql, parametros = montar_consulta(colunas, cultura, data_inicio, data_fim, offset, limite)
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = cursor.prefetchrows = limite
+            cursor.execute(sql, parametros)
+            return cursor.fetchall()
+
+    def count(self,
+              cultura: str | None = None,
+              data_inicio: date | None = None,
+              data_fim: date | None = None) -> int:
+        sql, parametros = montar_contagem(cultura, data_inicio, data_fim)
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, parametros)
+            return cursor.fetchone()[0]
+
+    def aggregate_by_culture(self,
+                             cultura: str | None = None,
+                             data_inicio: date | None = None,
+                             data_fim: date | None = None) -> Dict[str, Agregado]:
+        sql, parametros = montar_agregacao(cultura, data_inicio, data_fim)
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, parametros)
+            return _agrupar_agregados(cursor.fetchall())
+
+    def apply_changes(self,
+                      inserir: Sequence[Linha],
+                      atualizar: Sequence[LinhaComId],
+                      remover: Sequence[int],
+                      batch_size: int = 1000) -> ResultadoSincronizacao:
+        novos_ids: List[int] = []
+        atualizados = removidos = 0
+
+        with self.pool.acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                for lote in _lotes(inserir, batch_size):
+                    id_gerado = cursor.var(int, arraysize=len(lote))
+                    cursor.setinputsizes(id_gerado=id_gerado)
+                    cursor.executemany("""
+                        INSERT INTO harvest_loss (cultura, area_plantada_ha, prod_estimada_t, prod_real_t,
+                                                  data_colheita, obs)
+                        VALUES (:cultura, :area, :estimada, :real, :data, :obs)
+                        RETURNING id INTO :id_gerado
+                    """, [_binds(*linha) for linha in lote])
+                    # Com executemany, cada execução devolve a lista de valores do RETURNING
+                    novos_ids.extend(id_gerado.getvalue(i)[0] for i in range(len(lote)))
+                for lote in _lotes(atualizar, batch_size):
+                    cursor.executemany("""
+                        UPDATE harvest_loss
+                        SET cultura = :cultura, area_plantada_ha = :area, prod_estimada_t = :estimada,
+                            prod_real_t = :real, data_colheita = :data, obs = :obs
+                        WHERE id = :id
+                    """, _binds_com_id(lote))
+                    atualizados += cursor.rowcount
+                for lote in _lotes(remover, batch_size):
+                    cursor.executemany("DELETE FROM harvest_loss WHERE id = :id", [{"id": id_} for id_ in lote])
+                    removidos += cursor.rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        logger.info(f"🔄 Sincronização aplicada: {len(novos_ids)} inseridos, {atualizados} atualizados, "
+                    f"{removidos} removidos.")
+        return novos_ids, atualizados, removidos
+
+    def update(self, id_: int, campo: str, novo_valor) -> None:
+        try:
+            with self.pool.acquire() as conn:
+                query = f"UPDATE harvest_loss SET {campo} = :1 WHERE id = :2"
+                conn.cursor().execute(query, [novo_valor, id_])
+                conn.commit()
+                logger.info(f"🔄 Registro ID {id_} atualizado com sucesso.")
+        except Exception as e:
+            logger.error(f"Erro ao atualizar registro: {e}")
+
+    def delete(self, id_: int) -> None:
+        try:
+            with self.pool.acquire() as conn:
+                conn.cursor().execute("DELETE FROM harvest_loss WHERE id = :1", [id_])
+                conn.commit()
+                logger.info(f"🗑️ Registro ID {id_} excluído com sucesso.")
+        except Exception as e:
+            logger.error(f"Erro ao deletar registro: {e}")
+
+    def close(self) -> None:
+        """As conexões pertencem ao pool compartilhado, encerrado por `close_pools()` ao sair do programa."""
+        logger.info("🔌 Conexão com banco de dados liberada.")
+
+
+class SQLiteDatabase(BaseDatabase):
+    """
+    Implementação local do banco com SQLite, com a mesma interface de `Database`.
+    Útil para testes e benchmarks sem um servidor Oracle (use ':memory:' para um banco temporário).
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        try:
+            self.conn = sqlite3.connect(path)
+            self.cursor = self.conn.cursor()
             self.cursor.execute("""
-                                INSERT INTO harvest_loss (cultura, area_plantada_ha, prod_estimada_t, prod_real_t,
-                                                          data_colheita, obs)
-                                VALUES (:1, :2, :3, :4, :5, :6)
-                                """, [cultura, area, estimada, real, data_colheita, obs])
+                                CREATE TABLE IF NOT EXISTS harvest_loss
+                                (
+                                    id               INTEGER PRIMARY KEY,
+                                    cultura          TEXT NOT NULL,
+                                    area_plantada_ha REAL NOT NULL,
+                                    prod_estimada_t  REAL NOT NULL,
+                                    prod_real_t      REAL NOT NULL,
+                                    data_colheita    TEXT NOT NULL,
+                                    obs              TEXT
+                                )
+                                """)
+            self.cursor.execute(
+                "CREATE INDEX IF NOT EXISTS harvest_loss_dup_ix ON harvest_loss (cultura, data_colheita)"
+            )
             self.conn.commit()
-            logger.info("📦 Perda agrícola inserida com sucesso no banco.")
+            logger.info(f"✅ Conectado ao banco SQLite '{path}'.")
+        except Exception as e:
+            logger.error(f"Erro ao conectar ao banco SQLite: {e}")
+            raise
+
+    @staticmethod
+    def _parametros(cultura: str, area: float, estimada: float, real: float, data_colheita: date,
+                    obs: str) -> dict:
+        """Os mesmos parâmetros de `_binds`, com a data em texto ISO (como é guardada no SQLite)."""
+        parametros = _binds(cultura, area, estimada, real, data_colheita, obs)
+        parametros["data"] = data_colheita.isoformat()[:10]
+        return parametros
+
+    _INSERT_SEM_DUPLICADOS = """
+        INSERT INTO harvest_loss (cultura, area_plantada_ha, prod_estimada_t, prod_real_t, data_colheita, obs)
+        SELECT :cultura, :area, :estimada, :real, :data, :obs
+        WHERE NOT EXISTS (SELECT 1
+                          FROM harvest_loss
+                          WHERE cultura = :cultura AND area_plantada_ha = :area AND prod_estimada_t = :estimada
+                            AND prod_real_t = :real AND data_colheita = :data
+                            AND IFNULL(obs, 'NULL') = IFNULL(:obs, 'NULL'))
+    """
 
+    def create(self, cultura: str, area: float, estimada: float, real: float, data_colheita: date,
+               obs: str = "") -> None:
+        try:
+            self.cursor.execute(self._INSERT_SEM_DUPLICADOS,
+                                self._parametros(cultura, area, estimada, real, data_colheita, obs))
+            self.conn.commit()
+            if self.cursor.rowcount:
+                logger.info("📦 Perda agrícola inserida com sucesso no banco.")
+            else:
+                logger.warning("⚠️ Registro já existe. Ignorando inserção duplicada.")
         except Exception as e:
             logger.error(f"Erro ao inserir no banco: {e}")
 
-    def read(self) -> list:
+    def create_many(self, linhas: Sequence[Linha], batch_size: int = 1000) -> ResultadoLote:
+        """
+        Insere vários registros em lotes com `executemany`, ignorando duplicados com um anti-join.
+        Faz um commit por lote e retorna (inseridos, duplicados, falhas). Se um lote falhar,
+        ele é refeito linha a linha para identificar os registros com erro.
+        """
+        inseridos = 0
+        falhas: List[Tuple[int, str]] = []
+
+        for inicio in range(0, len(linhas), batch_size):
+            lote = linhas[inicio:inicio + batch_size]
+            antes = self.conn.total_changes
+            try:
+                self.cursor.executemany(self._INSERT_SEM_DUPLICADOS,
+                                        [self._parametros(*linha) for linha in lote])
+                self.conn.commit()
+                inseridos += self.conn.total_changes - antes
+            except Exception:
+                self.conn.rollback()
+                for i, linha in enumerate(lote, start=inicio):
+                    try:
+                        self.cursor.execute(self._INSERT_SEM_DUPLICADOS, self._parametros(*linha))
+                        inseridos += self.cursor.rowcount
+                    except Exception as e:
+                        falhas.append((i, str(e)))
+                self.conn.commit()
+
+        duplicados = len(linhas) - inseridos - len(falhas)
+        logger.info(f"📦 {inseridos} perdas inseridas em lote ({duplicados} duplicadas ignoradas).")
+        return inseridos, duplicados, falhas
+
+    def read_iter(self,
+                  colunas: Sequence[str] | None = None,
+                  cultura: str | None = None,
+                  data_inicio: date | None = None,
+                  data_fim: date | None = None,
+                  arraysize: int = 1000,
+                  prefetchrows: int | None = None) -> Iterator[tuple]:
+        """Mesma interface de `Database.read_iter`; `prefetchrows` não se aplica ao SQLite."""
+        sql, parametros = montar_consulta(colunas, cultura, data_inicio, data_fim)
+        return self._consultar(sql, parametros, colunas, arraysize)
+
+    @staticmethod
+    def _datas_iso(parametros: dict) -> dict:
+        return {chave: valor.isoformat() if isinstance(valor, date) else valor
+                for chave, valor in parametros.items()}
+
+    def _consultar(self, sql: str, parametros: dict, colunas: Sequence[str] | None,
+                   arraysize: int = 1000) -> Iterator[tuple]:
+        """Executa o SELECT convertendo as datas (guardadas como texto ISO) de e para `date`."""
+        colunas = list(colunas or COLUNAS)
+        pos_data = colunas.index("data_colheita") if "data_colheita" in colunas else None
+
+        cursor = self.conn.cursor()
         try:
-            self.cursor.execute("SELECT * FROM harvest_loss ORDER BY id")
-            rows = self.cursor.fetchall()
-            logger.info(f"🔍 {len(rows)} registros recuperados do banco.")
-            return rows
-        except Exception as e:
-            logger.error(f"Erro ao buscar dados: {e}")
-            return []
+            cursor.arraysize = arraysize
+            cursor.execute(sql, self._datas_iso(parametros))
+            while True:
+                lote = cursor.fetchmany()
+                if not lote:
+                    break
+                for row in lote:
+                    if pos_data is not None:
+                        row = (*row[:pos_data], parse_iso_date(row[pos_data]), *row[pos_data + 1:])
+                    yield row
+        finally:
+            cursor.close()
+
+    def read_page(self,
+                  offset: int,
+                  limite: int,
+                  colunas: Sequence[str] | None = None,
+                  cultura: str | None = None,
+                  data_inicio: date | None = None,
+                  data_fim: date | None = None) -> List[tuple]:
+        sql, parametros = montar_consulta(colunas, cultura, data_inicio, data_fim, offset, limite, dialeto="sqlite")
+        return list(self._consultar(sql, parametros, colunas, arraysize=limite))
+
+    def count(self,
+              cultura: str | None = None,
+              data_inicio: date | None = None,
+              data_fim: date | None = None) -> int:
+        sql, parametros = montar_contagem(cultura, data_inicio, data_fim)
+        return self.conn.execute(sql, self._datas_iso(parametros)).fetchone()[0]
+
+    def aggregate_by_culture(self,
+                             cultura: str | None = None,
+                             data_inicio: date | None = None,
+                             data_fim: date | None = None) -> Dict[str, Agregado]:
+        sql, parametros = montar_agregacao(cultura, data_inicio, data_fim)
+        return _agrupar_agregados(self.conn.execute(sql, self._datas_iso(parametros)).fetchall())
+
+    def apply_changes(self,
+                      inserir: Sequence[Linha],
+                      atualizar: Sequence[LinhaComId],
+                      remover: Sequence[int],
+                      batch_size: int = 1000) -> ResultadoSincronizacao:
+        def _com_id(linhas: Sequence[LinhaComId]) -> List[dict]:
+            return [{"id": linha[0], **self._parametros(*linha[1:])} for linha in linhas]
+
+        comandos = (
+            ("""
+             UPDATE harvest_loss
+             SET cultura = :cultura, area_plantada_ha = :area, prod_estimada_t = :estimada,
+                 prod_real_t = :real, data_colheita = :data, obs = :obs
+             WHERE id = :id
+             """, atualizar, _com_id),
+            ("DELETE FROM harvest_loss WHERE id = :id", remover, lambda ids: [{"id": id_} for id_ in ids]),
+        )
+
+        novos_ids: List[int] = []
+        contagens = []
+        try:
+            # executemany não devolve o id gerado de cada linha; as inserções vão uma a uma
+            for linha in inserir:
+                self.cursor.execute("""
+                    INSERT INTO harvest_loss (cultura, area_plantada_ha, prod_estimada_t, prod_real_t,
+                                              data_colheita, obs)
+                    VALUES (:cultura, :area, :estimada, :real, :data, :obs)
+                """, self._parametros(*linha))
+                novos_ids.append(self.cursor.lastrowid)
+            for sql, itens, parametros in comandos:
+                antes = self.conn.total_changes
+                for lote in _lotes(itens, batch_size):
+                    self.cursor.executemany(sql, parametros(lote))
+                contagens.append(self.conn.total_changes - antes)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        atualizados, removidos = contagens
+        logger.info(f"🔄 Sincronização aplicada: {len(novos_ids)} inseridos, {atualizados} atualizados, "
+                    f"{removidos} removidos.")
+        return novos_ids, atualizados, removidos
 
     def update(self, id_: int, campo: str, novo_valor) -> None:
         try:
-            query = f"UPDATE harvest_loss SET {campo} = :1 WHERE id = :2"
-            self.cursor.execute(query, [novo_valor, id_])
+            if isinstance(novo_valor, date):
+                novo_valor = novo_valor.isoformat()[:10]
+            self.cursor.execute(f"UPDATE harvest_loss SET {campo} = ? WHERE id = ?", [novo_valor, id_])
             self.conn.commit()
             logger.info(f"🔄 Registro ID {id_} atualizado com sucesso.")
         except Exception as e:
@@ -98,7 +743,7 @@ class Database:
 
     def delete(self, id_: int) -> None:
         try:
-            self.cursor.execute("DELETE FROM harvest_loss WHERE id = :1", [id_])
+            self.cursor.execute("DELETE FROM harvest_loss WHERE id = ?", [id_])
             self.conn.commit()
             logger.info(f"🗑️ Registro ID {id_} excluído com sucesso.")
         except Exception as e:
@@ -111,3 +756,19 @@ class Database:
             logger.info("🔌 Conexão com banco de dados encerrada.")
         except Exception as e:
             logger.warning(f"Erro ao encerrar conexão: {e}")
+
+
+def create_database(backend: str | None = None) -> BaseDatabase:
+    """
+    Cria o backend de banco configurado em DB_BACKEND ('oracle', padrão, ou 'sqlite').
+    Para o SQLite o arquivo vem de SQLITE_PATH (padrão ':memory:').
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    backend = (backend or os.getenv("DB_BACKEND", "oracle")).lower()
+
+    if backend == "oracle":
+        return Database()
+    if backend == "sqlite":
+        return SQLiteDatabase(os.getenv("SQLITE_PATH", ":memory:"))
+    raise ValueError(f"Backend de banco inválido: {backend}. Use 'oracle' ou 'sqlite'.")
@@ -0,0 +1,43 @@
+"""
+Conversão de datas em texto usada nas cargas e nas entradas do usuário.
+
+Os arquivos têm poucos milhares de datas distintas repetidas em milhões de registros, então cada
+texto é convertido uma vez e memorizado (cache limitado a `TAMANHO_CACHE` entradas). Os formatos
+usuais ('AAAA-MM-DD' e 'dd/mm/aaaa') têm caminho rápido sem `strptime`; variações aceitas pelo
+`strptime` (ex: '5/3/2024') continuam válidas. Datas inválidas geram ValueError.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, List
+
+TAMANHO_CACHE = 1 << 14
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def parse_iso_date(texto: str) -> date:
+    """Converte 'AAAA-MM-DD'."""
+    if len(texto) == 10 and texto[4] == "-" and texto[7] == "-":
+        return date.fromisoformat(texto)
+    return datetime.strptime(texto, "%Y-%m-%d").date()
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def iso_to_ordinal(texto: str) -> int:
+    """Converte 'AAAA-MM-DD' direto para o ordinal usado no armazenamento."""
+    return parse_iso_date(texto).toordinal()
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def parse_br_date(texto: str) -> date:
+    """Converte 'dd/mm/aaaa'."""
+    if (len(texto) == 10 and texto[2] == "/" and texto[5] == "/" and texto.isascii()
+            and texto.replace("/", "").isdigit()):
+        return date(int(texto[6:]), int(texto[3:5]), int(texto[:2]))
+    return datetime.strptime(texto, "%d/%m/%Y").date()
+
+
+def iso_column_to_ordinals(textos: Iterable[str]) -> List[int]:
+    """Converte uma coluna de datas 'AAAA-MM-DD', processando cada texto distinto uma única vez."""
+    textos = list(textos)
+    ordinais = {texto: iso_to_ordinal(texto) for texto in set(textos)}
+    return [ordinais[texto] for texto in textos]
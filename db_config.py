@@ -1,6 +1,6 @@
 import os
-from dotenv import set_key, load_dotenv
-import oracledb
+from dotenv import set_key
+from database import Database
 from pathlib import Path
 
 ENV_PATH = Path(".env")
@@ -30,20 +30,12 @@ def update_env():
 
 def test_connect():
     print("\n🔌 Testando conexão com o banco Oracle...")
-    load_dotenv()
-
-    user = os.getenv("ORACLE_USER")
-    password = os.getenv("ORACLE_PASSWORD")
-    host = os.getenv("ORACLE_HOST")
-    port = os.getenv("ORACLE_PORT", "1521")
-    service = os.getenv("ORACLE_SERVICE")
-
-    dsn = f"{host}:{port}/{service}"
 
     try:
-        with oracledb.connect(user=user, password=password, dsn=dsn) as conn:
-            print("✅ Conexão bem-sucedida!")
-            return True
+        # Só testa a conexão: a verificação/criação da tabela fica para o uso normal
+        Database(verificar_tabela=False).ping()
+        print("✅ Conexão bem-sucedida!")
+        return True
     except Exception as e:
         print(f"❌ Falha na conexão: {e}")
         return False
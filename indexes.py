@@ -0,0 +1,186 @@
+"""
+Índices secundários mantidos pelo HarvestReport.
+
+Os índices são construídos sob demanda a partir do backend de armazenamento e depois
+atualizados incrementalmente a cada mutação, evitando varrer todos os registros por consulta.
+"""
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, Iterable, List
+
+from storage import DESLOCAMENTO_DATA, Agregado, chave_data, percentual_perda
+
+
+class CultureIndex:
+    """Índice de ids por cultura (nome em minúsculas), na ordem de inserção."""
+
+    def __init__(self, ids_por_cultura: Dict[str, Iterable[int]] | None = None) -> None:
+        self._ids: Dict[str, Dict[int, None]] = {
+            cultura: dict.fromkeys(ids) for cultura, ids in (ids_por_cultura or {}).items()
+        }
+
+    def adicionar(self, loss) -> None:
+        self._ids.setdefault(loss.cultura.lower(), {})[loss.id] = None
+
+    def remover(self, loss) -> None:
+        chave = loss.cultura.lower()
+        ids = self._ids.get(chave)
+        if ids is None:
+            return
+        ids.pop(loss.id, None)
+        if not ids:
+            del self._ids[chave]
+
+    def ids(self, cultura: str) -> List[int]:
+        return list(self._ids.get(cultura.lower(), ()))
+
+    def culturas(self) -> List[str]:
+        return list(self._ids)
+
+    def contagens(self) -> Dict[str, int]:
+        return {cultura: len(ids) for cultura, ids in self._ids.items()}
+
+
+@dataclass
+class CultureStats:
+    """Agregados de uma cultura: quantidade, somas e extremos do percentual de perda."""
+
+    registros: int = 0
+    soma_percentual: float = 0.0
+    prod_estimada_t: float = 0.0
+    prod_real_t: float = 0.0
+    perda_minima: float | None = None
+    perda_maxima: float | None = None
+
+    def acumular(self, loss) -> float:
+        """Soma um registro aos agregados e retorna o percentual de perda dele."""
+        pct = percentual_perda(loss.prod_estimada_t, loss.prod_real_t)
+        self.registros += 1
+        self.soma_percentual += pct
+        self.prod_estimada_t += loss.prod_estimada_t
+        self.prod_real_t += loss.prod_real_t
+        if self.perda_minima is None or pct < self.perda_minima:
+            self.perda_minima = pct
+        if self.perda_maxima is None or pct > self.perda_maxima:
+            self.perda_maxima = pct
+        return pct
+
+    @property
+    def perda_media(self) -> float:
+        """Média simples dos percentuais de perda de cada registro."""
+        return round(self.soma_percentual / self.registros, 2)
+
+    @property
+    def perda_media_ponderada(self) -> float:
+        """Perda média ponderada pela produção estimada (toneladas perdidas / estimadas)."""
+        return percentual_perda(self.prod_estimada_t, self.prod_real_t)
+
+    @property
+    def dict(self) -> dict:
+        return {
+            "registros": self.registros,
+            "perda_media": self.perda_media,
+            "perda_media_ponderada": self.perda_media_ponderada,
+            "perda_minima": self.perda_minima,
+            "perda_maxima": self.perda_maxima,
+            "prod_estimada_t": round(self.prod_estimada_t, 2),
+            "prod_real_t": round(self.prod_real_t, 2),
+        }
+
+
+class CultureAggregates:
+    """
+    Agregados por cultura mantidos incrementalmente. Somas e contagens são atualizadas em O(1);
+    quando um registro com o menor ou maior percentual é removido, os extremos daquela cultura
+    são recalculados sob demanda com `recalcular(cultura)`, que retorna os percentuais atuais.
+    """
+
+    def __init__(self, agregados: Dict[str, Agregado], recalcular: Callable[[str], Iterable[float]]) -> None:
+        self._recalcular = recalcular
+        self._stats: Dict[str, CultureStats] = {
+            cultura: CultureStats(*agregado) for cultura, agregado in agregados.items()
+        }
+        self._extremos_pendentes: set = set()
+
+    def adicionar(self, loss) -> None:
+        self._stats.setdefault(loss.cultura.lower(), CultureStats()).acumular(loss)
+
+    def remover(self, loss) -> None:
+        chave = loss.cultura.lower()
+        stats = self._stats.get(chave)
+        if stats is None:
+            return
+
+        stats.registros -= 1
+        if stats.registros <= 0:
+            del self._stats[chave]
+            self._extremos_pendentes.discard(chave)
+            return
+
+        pct = percentual_perda(loss.prod_estimada_t, loss.prod_real_t)
+        stats.soma_percentual -= pct
+        stats.prod_estimada_t -= loss.prod_estimada_t
+        stats.prod_real_t -= loss.prod_real_t
+        if pct in (stats.perda_minima, stats.perda_maxima):
+            self._extremos_pendentes.add(chave)
+
+    def estatisticas(self) -> Dict[str, CultureStats]:
+        """Retorna os agregados por cultura (em minúsculas), na ordem de primeira aparição."""
+        for chave in self._extremos_pendentes:
+            percentuais = list(self._recalcular(chave))
+            self._stats[chave].perda_minima = min(percentuais)
+            self._stats[chave].perda_maxima = max(percentuais)
+        self._extremos_pendentes.clear()
+        return dict(self._stats)
+
+
+class DateIndex:
+    """
+    Ids ordenados por data de colheita (e id, para desempate), em uma lista de chaves inteiras.
+    Inserção e remoção por bisseção; consultas por intervalo custam O(log n + resultado).
+    """
+
+    def __init__(self, chaves: List[int] | None = None) -> None:
+        self._chaves: List[int] = chaves or []
+
+    def adicionar(self, loss) -> None:
+        insort(self._chaves, chave_data(loss.data_ordinal, loss.id))
+
+    def remover(self, loss) -> None:
+        chave = chave_data(loss.data_ordinal, loss.id)
+        i = bisect_left(self._chaves, chave)
+        if i < len(self._chaves) and self._chaves[i] == chave:
+            del self._chaves[i]
+
+    def ids(self, inicio: date | None = None, fim: date | None = None) -> List[int]:
+        """Ids com data em [inicio, fim] (limites opcionais e inclusivos), em ordem de data."""
+        esquerda = 0 if inicio is None else bisect_left(self._chaves, chave_data(inicio.toordinal(), 0))
+        direita = (len(self._chaves) if fim is None
+                   else bisect_right(self._chaves, chave_data(fim.toordinal() + 1, 0) - 1))
+        return [chave % DESLOCAMENTO_DATA for chave in self._chaves[esquerda:direita]]
+
+    def limites(self) -> tuple[date, date] | None:
+        """Primeira e última data registradas."""
+        if not self._chaves:
+            return None
+        return (date.fromordinal(self._chaves[0] // DESLOCAMENTO_DATA),
+                date.fromordinal(self._chaves[-1] // DESLOCAMENTO_DATA))
+
+
+PERIODOS = ("ano", "mes", "safra")
+
+
+def chave_periodo(data: date, periodo: str, inicio_safra: int = 7) -> str:
+    """
+    Rótulo do período de uma data: 'ano' -> '2024', 'mes' -> '2024-03', 'safra' -> '2023/2024'
+    (a safra começa no mês `inicio_safra`, julho por padrão, e termina no mês anterior do ano seguinte).
+    """
+    if periodo == "ano":
+        return str(data.year)
+    if periodo == "mes":
+        return f"{data.year}-{data.month:02d}"
+    if periodo == "safra":
+        ano = data.year if data.month >= inicio_safra else data.year - 1
+        return f"{ano}/{ano + 1}"
+    raise ValueError(f"Período inválido: {periodo}. Use {', '.join(PERIODOS)}.")
@@ -0,0 +1,90 @@
+"""
+Ingestão paralela de vários arquivos JSON/JSON Lines (ex: um arquivo por fazenda).
+
+Cada arquivo é lido e validado em um processo do pool; os registros voltam como tuplas simples
+(baratas de serializar entre processos) e são mesclados na ordem dos arquivos, que é sempre a
+ordem alfabética dos caminhos. Por isso a reatribuição de ids repetidos é determinística,
+independentemente de qual processo termina primeiro.
+"""
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Set, Tuple
+
+from dates import iso_to_ordinal
+from json_stream import iter_json_records
+from validators import validar_registro
+
+EXTENSOES = (".json", ".jsonl")
+
+# (id, cultura, area_plantada_ha, prod_estimada_t, prod_real_t, data_colheita ordinal, obs)
+Registro = Tuple[int, str, float, float, float, int, str]
+
+# (caminho, registros válidos, [(posição no arquivo, mensagem de erro)])
+ResultadoArquivo = Tuple[str, List[Registro], List[Tuple[int, str]]]
+
+
+def resolve_files(origem: str) -> List[str]:
+    """Arquivos de um diretório (.json e .jsonl) ou de um padrão glob, em ordem alfabética."""
+    if os.path.isdir(origem):
+        caminhos = [os.path.join(origem, nome) for nome in os.listdir(origem) if nome.endswith(EXTENSOES)]
+    else:
+        caminhos = glob.glob(origem)
+    return sorted(c for c in caminhos if os.path.isfile(c))
+
+
+def parse_file(path: str) -> ResultadoArquivo:
+    """Lê e valida um arquivo (executado nos processos do pool)."""
+    registros: List[Registro] = []
+    erros: List[Tuple[int, str]] = []
+
+    try:
+        for posicao, item in enumerate(iter_json_records(path), start=1):
+            erro = validar_registro(item)
+            if erro is None:
+                try:
+                    ordinal = iso_to_ordinal(item["data_colheita"])
+                except (TypeError, ValueError):
+                    erro = f"data inválida: {item['data_colheita']!r}"
+            if erro is not None:
+                erros.append((posicao, erro))
+                continue
+            registros.append((item["id"], item["cultura"], item["area_plantada_ha"], item["prod_estimada_t"],
+                              item["prod_real_t"], ordinal, item.get("obs") or ""))
+    except (OSError, ValueError) as e:
+        erros.append((0, f"arquivo ilegível: {e}"))
+
+    return path, registros, erros
+
+
+def parse_files(caminhos: List[str], workers: int | None = None) -> Iterator[ResultadoArquivo]:
+    """Processa os arquivos em paralelo, devolvendo os resultados na ordem de `caminhos`."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(caminhos) <= 1:
+        yield from map(parse_file, caminhos)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(caminhos))) as executor:
+        yield from executor.map(parse_file, caminhos)
+
+
+def reassign_ids(resultados: List[ResultadoArquivo], ocupados: Set[int]) -> int:
+    """
+    Garante ids únicos: cada registro mantém seu id se ele ainda estiver livre (considerando
+    `ocupados` e os arquivos anteriores); os repetidos recebem ids novos a partir do maior id
+    existente, na ordem dos arquivos. Altera `resultados` e `ocupados`; retorna quantos mudaram.
+    """
+    maior = max(ocupados, default=0)
+    for _, registros, _ in resultados:
+        if registros:
+            maior = max(maior, max(r[0] for r in registros))
+
+    reatribuidos = 0
+    for _, registros, _ in resultados:
+        for i, registro in enumerate(registros):
+            if registro[0] in ocupados:
+                maior += 1
+                registros[i] = (maior, *registro[1:])
+                reatribuidos += 1
+            ocupados.add(registros[i][0])
+    return reatribuidos
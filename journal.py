@@ -0,0 +1,107 @@
+"""
+Diário (journal) de alterações, para salvar sem reescrever o arquivo base inteiro.
+
+Cada alteração vira uma linha JSON no arquivo '<base>.journal':
+    {"op": "insert" | "update", "id": 7, "registro": {...}}
+    {"op": "delete", "id": 7}
+
+As entradas ficam pendentes em memória até `gravar()`, que as anexa ao arquivo e faz fsync; o
+custo de salvar depende só da quantidade de alterações. Na carga, o arquivo base é lido e o diário
+é reaplicado por cima. Uma linha final truncada (queda no meio de uma gravação) é descartada.
+"""
+import json
+import os
+from typing import Iterator, List
+
+from logger_config import logger
+from serializer import encode
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+
+def journal_path(base: str) -> str:
+    return f"{base}.journal"
+
+
+class Journal:
+    def __init__(self, base: str) -> None:
+        self.base = base
+        self.path = journal_path(base)
+        self._pendentes: List[bytes] = []
+        self.entradas = self._reparar()
+
+    def _reparar(self) -> int:
+        """Remove uma última linha incompleta (para que novas entradas não se juntem a ela) e conta as entradas."""
+        try:
+            with open(self.path, "rb+") as f:
+                conteudo = f.read()
+                if conteudo and not conteudo.endswith(b"\n"):
+                    conteudo = conteudo[:conteudo.rfind(b"\n") + 1]
+                    f.truncate(len(conteudo))
+                    logger.warning(f"⚠️ Entrada incompleta no fim de '{self.path}' descartada.")
+                return conteudo.count(b"\n")
+        except FileNotFoundError:
+            return 0
+
+    def registrar(self, op: str, id_: int, registro=None) -> None:
+        """Enfileira a entrada; `registro` é um HarvestLoss, codificado pelo serializer."""
+        entrada = b'{"op":"%s","id":%d' % (op.encode("ascii"), id_)
+        if registro is not None:
+            entrada += b',"registro":' + encode(registro)
+        self._pendentes.append(entrada + b"}")
+
+    @property
+    def pendentes(self) -> int:
+        return len(self._pendentes)
+
+    def gravar(self) -> int:
+        """Anexa as entradas pendentes ao arquivo do diário e força a gravação em disco."""
+        if not self._pendentes:
+            return 0
+
+        with open(self.path, "ab") as f:
+            f.write(b"\n".join(self._pendentes) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        total = len(self._pendentes)
+        self.entradas += total
+        self._pendentes.clear()
+        return total
+
+    def truncar(self) -> None:
+        """Esvazia o diário (após o conteúdo ter sido compactado no arquivo base)."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.entradas = 0
+        self._pendentes.clear()
+
+
+def iter_journal(base: str) -> Iterator[dict]:
+    """Itera as entradas do diário de `base`, ignorando uma última linha incompleta."""
+    path = journal_path(base)
+    if not os.path.exists(path):
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for numero, linha in enumerate(f, start=1):
+            if not linha.strip():
+                continue
+            try:
+                entrada = json.loads(linha)
+            except json.JSONDecodeError:
+                logger.warning(f"⚠️ Entrada incompleta na linha {numero} de '{path}' descartada.")
+                return
+            yield entrada
+
+
+def journal_entries(base: str) -> int:
+    """Quantidade de entradas gravadas no diário de `base` (0 se não houver diário)."""
+    try:
+        with open(journal_path(base), "rb") as f:
+            return sum(1 for linha in f if linha.strip())
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,171 @@
+"""
+Leitura e escrita incremental de registros em JSON.
+
+Aceita tanto JSON Lines (um objeto por linha) quanto um array JSON no topo do arquivo,
+que é lido em blocos e decodificado elemento a elemento, sem carregar o documento inteiro.
+"""
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import IO, Iterable, Iterator, List, Tuple
+
+_DECODER = json.JSONDecoder()
+_ESPACOS = " \t\r\n"
+
+
+def _primeiro_caractere(f: IO[str]) -> str:
+    while True:
+        c = f.read(1)
+        if c == "" or c not in _ESPACOS:
+            return c
+
+
+def _iter_array(f: IO[str], bloco: int) -> Iterator[dict]:
+    """Decodifica os elementos de um array JSON cujo '[' inicial já foi consumido."""
+    buffer = ""
+    pos = 0
+    fim_arquivo = False
+
+    while True:
+        # Pula espaços e vírgulas entre os elementos
+        while pos < len(buffer) and buffer[pos] in _ESPACOS + ",":
+            pos += 1
+
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        try:
+            item, fim = _DECODER.raw_decode(buffer, pos)
+            # Um valor que termina exatamente no fim do buffer pode estar truncado
+            if fim < len(buffer) or fim_arquivo:
+                yield item
+                pos = fim
+                continue
+        except json.JSONDecodeError:
+            if fim_arquivo:
+                raise
+
+        parte = f.read(bloco)
+        if not parte:
+            fim_arquivo = True
+        buffer = buffer[pos:] + parte
+        pos = 0
+
+
+def _iter_linhas(primeiro: str, f: IO[str]) -> Iterator[dict]:
+    linhas = chain([primeiro + f.readline()], f)
+    for numero, linha in enumerate(linhas, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido na linha {numero}: {e}") from e
+
+
+def iter_json_records(path: str, bloco: int = 1 << 16) -> Iterator[dict]:
+    """Itera os registros de um arquivo JSON (array) ou JSON Lines sem carregá-lo inteiro."""
+    with open(path, "r", encoding="utf-8") as f:
+        primeiro = _primeiro_caractere(f)
+        if primeiro == "":
+            return
+        if primeiro == "[":
+            yield from _iter_array(f, bloco)
+        else:
+            yield from _iter_linhas(primeiro, f)
+
+
+class RecordPager:
+    """
+    Páginas de um arquivo JSON ou JSON Lines lido de forma incremental. O leitor fica aberto entre
+    as páginas: avançar continua de onde a leitura parou e só voltar reabre o arquivo. Ao chegar
+    ao fim, o total passa a ser conhecido e a última página já fica guardada, sem nova leitura.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.total: int | None = None
+        self._iterador: Iterator[dict] | None = None
+        self._posicao = 0
+        # Última página não vazia obtida: ((início, tamanho), registros)
+        self._guardada: Tuple[Tuple[int, int], List[dict]] | None = None
+
+    def page(self, numero: int, tamanho: int) -> Tuple[List[dict], int | None]:
+        """Registros da página `numero` (a partir de 1) e o total, ou None enquanto o fim não foi lido."""
+        inicio = (numero - 1) * tamanho
+        if self._guardada is not None and self._guardada[0] == (inicio, tamanho):
+            return self._guardada[1], self.total
+        if self.total is not None and inicio >= self.total:
+            return [], self.total
+
+        if self._iterador is None or inicio < self._posicao:
+            self.close()
+            self._iterador = iter_json_records(self.path)
+            self._posicao = 0
+
+        # Pula até o início da página guardando os últimos registros, caso o arquivo acabe antes
+        pulados = deque(enumerate(islice(self._iterador, inicio - self._posicao), self._posicao), maxlen=tamanho)
+        if pulados:
+            self._posicao = pulados[-1][0] + 1
+        if self._posicao < inicio:
+            self.total = self._posicao
+            if self.total:
+                ultima = (self.total - 1) // tamanho * tamanho
+                self._guardada = ((ultima, tamanho), [registro for i, registro in pulados if i >= ultima])
+            return [], self.total
+
+        registros = list(islice(self._iterador, tamanho))
+        self._posicao += len(registros)
+        if len(registros) < tamanho:
+            self.total = self._posicao
+        if registros:
+            self._guardada = ((inicio, tamanho), registros)
+        return registros, self.total
+
+    def close(self) -> None:
+        if self._iterador is not None:
+            self._iterador.close()
+            self._iterador = None
+
+
+def chunked(itens: Iterable, tamanho: int) -> Iterator[List]:
+    """Agrupa um iterável em listas de até `tamanho` elementos."""
+    iterador = iter(itens)
+    while True:
+        bloco = list(islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+@contextmanager
+def atomic_open(path: str, binario: bool = False) -> Iterator[IO]:
+    """
+    Abre um arquivo temporário para escrita (texto UTF-8 ou, com `binario`, bytes) e, ao final,
+    o move sobre `path` com os.replace. Se a escrita falhar no meio (ou o processo cair),
+    o arquivo original continua intacto.
+    """
+    temporario = f"{path}.tmp"
+    try:
+        with (open(temporario, "wb") if binario else open(temporario, "w", encoding="utf-8")) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    os.replace(temporario, path)
+
+
+def write_json_lines(path: str, registros: Iterable[dict]) -> int:
+    """Escreve um registro por linha, sem montar a lista completa em memória. Retorna a quantidade."""
+    total = 0
+    with atomic_open(path) as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False))
+            f.write("\n")
+            total += 1
+    return total
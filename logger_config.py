@@ -1,4 +1,21 @@
+"""
+Configuração de logs da aplicação.
+
+Por padrão o log é assíncrono: o logger só enfileira os registros (QueueHandler) e uma thread
+em segundo plano (QueueListener) formata e grava no console e nos arquivos. Defina LOG_ASYNC=0
+para gravar de forma síncrona. Mensagens repetidas em sequência (ex: milhares de "Registro já
+existe" numa exportação) são limitadas por RepeatFilter e resumidas numa única linha.
+As cores do console são desligadas quando a saída não é um terminal ou se NO_COLOR estiver definida.
+"""
+import atexit
 import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Tuple
+
 from colorama import init, Fore, Style
 
 init(autoreset=True)
@@ -11,38 +28,161 @@ LEVEL_COLORS = {
     logging.CRITICAL: Fore.RED + Style.BRIGHT,
 }
 
+FORMATO = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def _terminal(stream) -> bool:
+    return os.getenv("NO_COLOR") is None and hasattr(stream, "isatty") and stream.isatty()
+
+
 class ColorFormatter(logging.Formatter):
-    def format(self, record):
-        original_msg = record.msg
-        color = LEVEL_COLORS.get(record.levelno, "")
-        record.msg = f"{color}{original_msg}{Style.RESET_ALL}"
-        formatted = super().format(record)
-        record.msg = original_msg
-        return formatted
+    """Colore a mensagem conforme o nível, sem alterar o LogRecord compartilhado entre handlers."""
+
+    def __init__(self, fmt: str | None = None, datefmt: str | None = None, cores: bool = True) -> None:
+        super().__init__(fmt, datefmt)
+        self.cores = cores
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        if not self.cores:
+            return super().formatMessage(record)
+        copia = logging.makeLogRecord(record.__dict__)
+        copia.message = f"{LEVEL_COLORS.get(record.levelno, '')}{record.message}{Style.RESET_ALL}"
+        return super().formatMessage(copia)
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Deixa passar no máximo `limite` registros iguais (mesmo nível e mensagem já formatada) a cada
+    `janela` segundos. Os excedentes são descartados e contados; a linha de resumo com a quantidade
+    suprimida é emitida por meio de `emitir` quando a mesma mensagem volta a aparecer depois da
+    janela, ou em `flush` (chamado ao encerrar o log).
+    """
+
+    def __init__(self, emitir: Callable[[logging.LogRecord], None], limite: int = 5, janela: float = 10.0) -> None:
+        super().__init__()
+        self._emitir = emitir
+        self.limite = limite
+        self.janela = janela
+        # chave -> [início da janela, registros vistos, último registro]
+        self._contagens: Dict[Tuple[str, int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "repeticoes", None) is not None:
+            return True
+
+        try:
+            mensagem = record.getMessage()
+        except Exception:
+            # argumentos incompatíveis com o texto: o erro fica para o handler reportar
+            mensagem = str(record.msg)
+        chave = (record.name, record.levelno, mensagem)
+        agora = time.monotonic()
+        with self._lock:
+            estado = self._contagens.get(chave)
+            resumo = None
+            if estado is None or agora - estado[0] >= self.janela:
+                if estado is not None:
+                    resumo = self._resumo(estado)
+                if len(self._contagens) > 1000:
+                    self._podar(agora)
+                estado = self._contagens[chave] = [agora, 0, record]
+            estado[1] += 1
+            estado[2] = record
+            passa = estado[1] <= self.limite
+
+        if resumo is not None:
+            self._emitir(resumo)
+        return passa
 
+    def _resumo(self, estado: list) -> logging.LogRecord | None:
+        suprimidos = estado[1] - self.limite
+        if suprimidos <= 0:
+            return None
+        ultimo = estado[2]
+        return logging.makeLogRecord({
+            "name": ultimo.name,
+            "levelno": ultimo.levelno,
+            "levelname": ultimo.levelname,
+            "msg": f"{ultimo.getMessage()} (repetida mais {suprimidos} vezes)",
+            "repeticoes": suprimidos,
+        })
 
-file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    def _podar(self, agora: float) -> None:
+        for chave in [c for c, e in self._contagens.items() if agora - e[0] >= self.janela and e[1] <= self.limite]:
+            del self._contagens[chave]
+
+    def flush(self) -> None:
+        """Emite os resumos pendentes (ex: ao encerrar o programa)."""
+        with self._lock:
+            resumos = [self._resumo(estado) for estado in self._contagens.values()]
+            self._contagens.clear()
+        for resumo in resumos:
+            if resumo is not None:
+                self._emitir(resumo)
+
+
+file_formatter = logging.Formatter(FORMATO)
 
 logger = logging.getLogger("sistema_agro")
 logger.setLevel(logging.DEBUG)
 
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.DEBUG)
-console_handler.setFormatter(ColorFormatter('%(asctime)s - %(levelname)s - %(message)s'))
-# logger.addHandler(console_handler)
+console_handler.setFormatter(ColorFormatter(FORMATO, cores=_terminal(console_handler.stream)))
 
-file_handler_info = logging.FileHandler('log.log')
+file_handler_info = logging.FileHandler('log.log', delay=True)
 file_handler_info.setLevel(logging.DEBUG)
 file_handler_info.addFilter(lambda record: record.levelno < logging.ERROR)
 file_handler_info.setFormatter(file_formatter)
-# logger.addHandler(file_handler_info)
 
-file_handler_error = logging.FileHandler('error.log')
+file_handler_error = logging.FileHandler('error.log', delay=True)
 file_handler_error.setLevel(logging.ERROR)
 file_handler_error.setFormatter(file_formatter)
-# logger.addHandler(file_handler_error)
+
+HANDLERS = (console_handler, file_handler_info, file_handler_error)
+
+repeat_filter = RepeatFilter(emitir=logger.handle)
+
+_fila: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = QueueHandler(_fila)
+_listener: QueueListener | None = None
+
+
+def set_console_colors(ativo: bool | None = None) -> None:
+    """Liga ou desliga as cores do console; None detecta se a saída é um terminal."""
+    console_handler.formatter.cores = _terminal(console_handler.stream) if ativo is None else ativo
+
+
+def start_async_logging() -> None:
+    """Passa a enfileirar os registros; a formatação e a escrita ficam com a thread do listener."""
+    global _listener
+    if _listener is not None:
+        return
+    for handler in HANDLERS:
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    _listener = QueueListener(_fila, *HANDLERS, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_async_logging() -> None:
+    """Emite os resumos pendentes, grava o que estiver na fila e volta ao modo síncrono."""
+    global _listener
+    repeat_filter.flush()
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    logger.removeHandler(queue_handler)
+    for handler in HANDLERS:
+        logger.addHandler(handler)
+
 
 if not logger.hasHandlers():
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler_info)
-    logger.addHandler(file_handler_error)
+    logger.addFilter(repeat_filter)
+    for handler in HANDLERS:
+        logger.addHandler(handler)
+    if os.getenv("LOG_ASYNC", "1") != "0":
+        start_async_logging()
+    atexit.register(stop_async_logging)
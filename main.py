@@ -3,15 +3,19 @@ from validators import validar_int
 from colorama import init, Fore, Style
 from core import HarvestReport
 from validators import validar_float, validar_str
-from datetime import datetime
+from dates import parse_br_date
 import os
 import platform
-from db_config import db_menu
-from database import Database
-import json
+import sys
+from database import create_database
+from journal import journal_entries
+from json_stream import RecordPager
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
 
 init(autoreset=True)
 DATABASE_CONN = None
+RELATORIO = HarvestReport()
 
 def abrir_imagem(caminho: str) -> None:
     sistema = platform.system()
@@ -29,6 +33,19 @@ def abrir_imagem(caminho: str) -> None:
     except Exception as e:
         print(f"❌ Não foi possível abrir a imagem automaticamente: {e}")
 
+def abrir_quando_pronto(futuro: Future) -> None:
+    """Abre o gráfico assim que a renderização em segundo plano terminar, sem travar o menu."""
+    def _abrir(f: Future) -> None:
+        if f.exception() is not None:
+            logger.error(f"Erro ao gerar o gráfico: {f.exception()}")
+            return
+        print(f"\n📈 Gráfico salvo em: {f.result()}")
+        abrir_imagem(f.result())
+
+    if not futuro.done():
+        print(Fore.CYAN + "\n⏳ Gerando gráfico em segundo plano...")
+    futuro.add_done_callback(_abrir)
+
 def limpar_tela() -> None:
     from time import sleep
 
@@ -93,7 +110,7 @@ def registrar_perda() -> None:
         data_str = input("📅  Data da colheita (dd/mm/aaaa): ").strip()
         while True:
             try:
-                datetime.strptime(data_str, "%d/%m/%Y")
+                data_colheita = parse_br_date(data_str)
                 break
             except ValueError:
                 print(Fore.RED + "❌ Formato inválido. Use dd/mm/aaaa.")
@@ -101,12 +118,12 @@ def registrar_perda() -> None:
 
         obs = input("📝  Observações (opcional): ").strip()
 
-        perda = HarvestReport.register_loss(
+        perda = RELATORIO.register_loss(
             cultura=cultura,
             area_plantada_ha=float(area),
             prod_estimada_t=float(estimada),
             prod_real_t=float(real),
-            data_colheita_str=data_str,
+            data_colheita_str=data_colheita,
             obs=obs
         )
 
@@ -116,60 +133,206 @@ def registrar_perda() -> None:
         print(Fore.YELLOW + "\n⚠️ Operação cancelada pelo usuário.\n")
 
 
+def ler_data_opcional(rotulo: str):
+    """Lê uma data dd/mm/aaaa; Enter em branco retorna None (sem limite)."""
+    while True:
+        data_str = input(f"📅  {rotulo} (dd/mm/aaaa, Enter para sem limite): ").strip()
+        if not data_str:
+            return None
+        try:
+            return parse_br_date(data_str)
+        except ValueError:
+            print(Fore.RED + "❌ Formato inválido. Use dd/mm/aaaa.")
+
+
+# Apaga a tela e posiciona o cursor no topo (o colorama converte no Windows)
+LIMPAR_TELA_ANSI = "\033[2J\033[H"
+
+
+def formatar_perda(perda) -> str:
+    perda_abs = round(perda.prod_estimada_t - perda.prod_real_t, 2)
+    perda_pct = round(perda_abs / perda.prod_estimada_t * 100, 2)
+    return (
+        Fore.WHITE + Style.BRIGHT + "─" * 60 + Style.RESET_ALL + "\n" +
+        Fore.GREEN + f"🌾 Cultura: {perda.cultura}   🆔 ID: {perda.id}\n" +
+        Fore.BLUE + f"📏 Área plantada: {perda.area_plantada_ha} ha\n" +
+        Fore.MAGENTA + f"📦 Produção estimada: {perda.prod_estimada_t} t\n" +
+        Fore.MAGENTA + f"📦 Produção real:     {perda.prod_real_t} t\n" +
+        Fore.YELLOW + f"📅 Data da colheita:  {perda.data_colheita.strftime('%d/%m/%Y')}\n" +
+        Fore.LIGHTBLACK_EX + f"📝 Observações: {perda.obs or 'Nenhuma'}\n" +
+        Fore.RED + f"❗ Perda estimada: {perda_abs} t\n" +
+        Fore.RED + f"📉 Percentual de perda: {perda_pct}%" + Style.RESET_ALL
+    )
+
+
+def paginar(titulo: str,
+            buscar: Callable[[int, int], Tuple[List, int | None]],
+            formatar: Callable[[object], str] = str,
+            tamanho: int = 10) -> None:
+    """
+    Exibe registros página a página. `buscar(pagina, tamanho)` retorna (itens da página, total ou
+    None se desconhecido), então só a página visível é lida; ao passar do fim, `buscar` deve
+    informar o total. Cada página é montada em um único texto e escrita de uma vez no terminal.
+    """
+    pagina = 1
+    while True:
+        itens, total = buscar(pagina, tamanho)
+        if not itens and pagina > 1 and total is not None:
+            # Passamos do fim: vai direto para a última página com registros
+            pagina = max(1, -(-total // tamanho))
+            continue
+
+        paginas = max(1, -(-total // tamanho)) if total is not None else None
+        partes = [LIMPAR_TELA_ANSI, Fore.BLUE + Style.BRIGHT + titulo + Style.RESET_ALL, ""]
+        if itens:
+            partes.extend(formatar(item) for item in itens)
+        else:
+            partes.append(Fore.YELLOW + "⚠️  Nenhuma perda encontrada." + Style.RESET_ALL)
+        partes.append(Fore.WHITE + Style.BRIGHT + "─" * 60 + Style.RESET_ALL)
+        partes.append(Fore.CYAN + f"📄 Página {pagina}" + (f" de {paginas} ({total} registros)" if paginas else "") +
+                      Style.RESET_ALL)
+        sys.stdout.write("\n".join(partes) + "\n")
+        sys.stdout.flush()
+
+        if not itens:
+            wait_tela()
+            return
+
+        comando = input(Fore.YELLOW + "👉 Enter: próxima | a: anterior | nº: ir para a página | "
+                                      "t: itens por página | 0: sair " + Style.RESET_ALL).strip().lower()
+        if comando == "0":
+            return
+        if comando == "":
+            ultima = paginas is not None and pagina >= paginas
+            if ultima or (paginas is None and len(itens) < tamanho):
+                return
+            pagina += 1
+        elif comando == "a":
+            pagina = max(1, pagina - 1)
+        elif comando == "t":
+            novo = input("🔢 Itens por página: ").strip()
+            if validar_int(novo) and int(novo) > 0:
+                primeiro = (pagina - 1) * tamanho
+                tamanho = int(novo)
+                pagina = primeiro // tamanho + 1
+        elif validar_int(comando) and int(comando) > 0:
+            pagina = min(int(comando), paginas) if paginas else int(comando)
+
+
 def listar_perdas() -> None:
     limpar_tela()
     print_menu("📋 LISTAGEM DE PERDAS AGRÍCOLAS\n")
-    print_menu("1. Listar todas as perdas\n2. Filtrar por cultura\n0. Voltar ao menu principal")
+    print_menu("1. Listar todas as perdas\n2. Filtrar por cultura\n3. Filtrar por período\n"
+               "0. Voltar ao menu principal")
 
     escolha = input(Fore.YELLOW + "\n👉 Escolha uma opção: " + Style.RESET_ALL).strip()
 
+    filtros = {}
     if escolha == "1":
-        perdas = HarvestReport.all()
         titulo = "📋 TODAS AS PERDAS REGISTRADAS"
     elif escolha == "2":
+        contagens = RELATORIO.culture_counts()
+        if contagens:
+            print(Fore.CYAN + "🌾 Culturas disponíveis: " +
+                  ", ".join(f"{nome} ({qtd})" for nome, qtd in contagens.items()))
         cultura = input("🌾 Digite o nome da cultura: " + Style.RESET_ALL).strip()
         while not validar_str(cultura):
             print(Fore.RED + "❌ Cultura inválida.")
             cultura = input("🌾 Digite o nome da cultura: ").strip()
-        perdas = HarvestReport.filter_by_culture(cultura)
+        filtros["cultura"] = cultura
         titulo = f"📋 PERDAS PARA A CULTURA: {cultura.upper()}"
+    elif escolha == "3":
+        limites = RELATORIO.date_range()
+        if limites:
+            print(Fore.CYAN + f"📅 Registros entre {limites[0].strftime('%d/%m/%Y')} e "
+                              f"{limites[1].strftime('%d/%m/%Y')}")
+        inicio = ler_data_opcional("Data inicial")
+        fim = ler_data_opcional("Data final")
+        filtros.update(data_inicio=inicio, data_fim=fim)
+        titulo = (f"📋 PERDAS DE {inicio.strftime('%d/%m/%Y') if inicio else 'INÍCIO'} "
+                  f"ATÉ {fim.strftime('%d/%m/%Y') if fim else 'FIM'}")
     elif escolha == "0":
         return
     else:
         print(Fore.RED + "❌ Opção inválida.")
         return
 
+    paginar(titulo, lambda pagina, tamanho: RELATORIO.page(pagina, tamanho, **filtros), formatar_perda)
+
+
+def registros_salvos_json(path: str = "data.json") -> None:
+    """Pagina o arquivo JSON lendo-o de forma incremental, continuando de onde a página anterior parou."""
+    if not os.path.exists(path):
+        print(Fore.YELLOW + f"⚠️ Arquivo '{path}' não encontrado.")
+        return
+
+    pendentes = journal_entries(path)
+    titulo = "🌿 REGISTROS SALVOS (JSON)"
+    if pendentes:
+        titulo += f" - mais {pendentes} alterações no diário ainda não compactadas"
+
+    leitor = RecordPager(path)
+    try:
+        paginar(titulo, leitor.page, tamanho=20)
+    finally:
+        leitor.close()
+
+
+def registros_salvos_db() -> None:
+    total = DATABASE_CONN.count()
+    logger.info(f"🔍 {total} registros no banco.")
+    paginar("🌿 REGISTROS SALVOS (BANCO)",
+            lambda pagina, tamanho: (DATABASE_CONN.read_page((pagina - 1) * tamanho, tamanho), total),
+            tamanho=20)
+
+
+def estatisticas_por_periodo(periodo: str) -> None:
+    nomes = {"ano": "ANO", "mes": "MÊS", "safra": "SAFRA (JULHO A JUNHO)"}
     limpar_tela()
-    print_menu(titulo + "\n")
+    print_menu(f"📊 ESTATÍSTICAS POR {nomes[periodo]}\n")
 
-    if not perdas:
+    cultura = input("🌾 Cultura (Enter para todas): ").strip() or None
+    estatisticas = RELATORIO.statistics_by_period(periodo, cultura=cultura)
+    if not estatisticas:
         print(Fore.YELLOW + "⚠️  Nenhuma perda encontrada.")
         return
 
-    for perda in perdas:
-        print(
-            Fore.WHITE + Style.BRIGHT + "─" * 60 + "\n" +
-            Fore.GREEN + f"🌾 Cultura: {perda.cultura}   🆔 ID: {perda.id}\n" +
-            Fore.BLUE + f"📏 Área plantada: {perda.area_plantada_ha} ha\n" +
-            Fore.MAGENTA + f"📦 Produção estimada: {perda.prod_estimada_t} t\n" +
-            Fore.MAGENTA + f"📦 Produção real:     {perda.prod_real_t} t\n" +
-            Fore.YELLOW + f"📅 Data da colheita:  {perda.data_colheita.strftime('%d/%m/%Y')}\n" +
-            Fore.LIGHTBLACK_EX + f"📝 Observações: {perda.obs or 'Nenhuma'}"
-        )
-        perda_abs = round(perda.prod_estimada_t - perda.prod_real_t, 2)
-        perda_pct = round(perda_abs / perda.prod_estimada_t * 100, 2)
-        print(Fore.RED + f"❗ Perda estimada: {perda_abs} t")
-        print(Fore.RED + f"📉 Percentual de perda: {perda_pct}%")
-    print(Fore.WHITE + Style.BRIGHT + "─" * 60)
+    for chave, stats in estatisticas.items():
+        print(Fore.GREEN + f"   {chave}: " + Style.RESET_ALL +
+              f"{stats.registros} registros | média {stats.perda_media}% | "
+              f"ponderada {stats.perda_media_ponderada}% | "
+              f"mín {stats.perda_minima}% | máx {stats.perda_maxima}%")
+
+
+def menu_estatisticas() -> None:
+    limpar_tela()
+    print_menu("📊 DADOS ESTATÍSTICOS\n")
+    opcoes = "1. Por cultura (com gráfico)\n2. Por ano\n3. Por mês\n4. Por safra\n"
+    if DATABASE_CONN is not None:
+        opcoes += "5. Por cultura, calculado no banco (sem carregar os registros)\n"
+    print_menu(opcoes + "0. Voltar")
+    escolha = input(Fore.YELLOW + "\n👉 Escolha uma opção: " + Style.RESET_ALL).strip()
 
+    if escolha == "1" or (escolha == "5" and DATABASE_CONN is not None):
+        db = DATABASE_CONN if escolha == "5" else None
+        grafico = RELATORIO.get_statistics(aguardar_grafico=False, db_instance=db)
+        if grafico:
+            abrir_quando_pronto(grafico)
+    elif escolha in ("2", "3", "4"):
+        estatisticas_por_periodo({"2": "ano", "3": "mes", "4": "safra"}[escolha])
+    elif escolha == "0":
+        return
+    else:
+        print(Fore.RED + "❌ Opção inválida.")
     wait_tela()
 
+
 def editar_perda() -> None:
     limpar_tela()
     print_menu("✏️ EDITAR OU DELETAR PERDA AGRÍCOLA\n")
 
     try:
-        perdas = HarvestReport.all()
+        perdas = RELATORIO.all()
         if not perdas:
             print(Fore.YELLOW + "⚠️ Nenhuma perda registrada.")
             wait_tela()
@@ -197,7 +360,7 @@ def editar_perda() -> None:
         if acao == "d":
             confirmar = input(Fore.RED + "❗ Tem certeza que deseja deletar este registro? (s/n): ").strip().lower()
             if confirmar == "s":
-                HarvestReport._data = [p for p in HarvestReport._data if p.id != id_escolhido]
+                RELATORIO.remove_loss(id_escolhido)
                 print(Fore.GREEN + f"🗑️ Perda ID {id_escolhido} removida com sucesso.")
             else:
                 print("❌ Exclusão cancelada.")
@@ -214,9 +377,7 @@ def editar_perda() -> None:
             nova_area = float(area_str) if area_str else perda.area_plantada_ha
             nova_estim = float(estimada_str) if estimada_str else perda.prod_estimada_t
             nova_real = float(real_str) if real_str else perda.prod_real_t
-            nova_data = datetime.strptime(data_str, "%d/%m/%Y").date() if data_str else perda.data_colheita
-
-            HarvestReport._data = [p for p in HarvestReport._data if p.id != id_escolhido]
+            nova_data = parse_br_date(data_str) if data_str else perda.data_colheita
 
             from core import HarvestLoss
             novo = HarvestLoss(
@@ -228,7 +389,7 @@ def editar_perda() -> None:
                 data_colheita=nova_data,
                 obs=obs
             )
-            HarvestReport._data.append(novo)
+            RELATORIO.replace_loss(novo)
 
             print(Fore.GREEN + f"\n✅ Perda ID {id_escolhido} atualizada com sucesso!")
         else:
@@ -246,7 +407,7 @@ def load_data() -> None:
     global DATABASE_CONN
     try:
         try:
-            db = Database()
+            db = create_database()
             DATABASE_CONN = db
         except Exception as error:
             logger.error(error)
@@ -262,9 +423,9 @@ def load_data() -> None:
                 option = int(response)
 
                 if option == 1:
-                    HarvestReport.load_from_json()
+                    RELATORIO.open_journaled()
                 elif option == 2:
-                    HarvestReport.load_from_db(db.read())
+                    RELATORIO.load_from_db(db.read_iter())
                 elif option == 0:
                     ...
                 else:
@@ -274,7 +435,7 @@ def load_data() -> None:
                 logger.warning("A opção deve ser um número inteiro.")
                 input(Fore.YELLOW + "Pressione Enter para continuar...")
         else:
-            HarvestReport.load_from_json()
+            RELATORIO.open_journaled()
     except Exception as error:
         logger.error(error)
 
@@ -317,12 +478,12 @@ def menu() -> None:
                             option = int(response)
                             if option in options:
                                 if option == 1:
-                                    HarvestReport.export_to_json()
+                                    RELATORIO.save_json()
                                 elif option == 2:
-                                    HarvestReport.export_to_db(DATABASE_CONN)
+                                    RELATORIO.sync_to_db(DATABASE_CONN)
                                 elif option == 3:
-                                    HarvestReport.export_to_json()
-                                    HarvestReport.export_to_db(DATABASE_CONN)
+                                    RELATORIO.save_json()
+                                    RELATORIO.sync_to_db(DATABASE_CONN)
                                 elif option == 0:
                                     break
                             else:
@@ -333,10 +494,7 @@ def menu() -> None:
                             input(Fore.YELLOW + "Pressione Enter para continuar...")
 
                 elif option == 5:
-                    path_img = HarvestReport.get_statistics()
-                    if path_img:
-                        abrir_imagem(path_img)
-                    wait_tela()
+                    menu_estatisticas()
 
                 elif option == 6:
                     while True:
@@ -355,14 +513,9 @@ def menu() -> None:
                             option = int(response)
                             if option in options:
                                 if option == 1:
-                                    with open("data.json", "r", encoding="utf-8") as f:
-                                        registros = json.load(f)
-                                        logger.info(f"🔍 {len(registros)} registros recuperados do json.")
-                                        for item in registros:
-                                            print(item)
+                                    registros_salvos_json()
                                 elif option == 2:
-                                    for item in DATABASE_CONN.read():
-                                        print(item)
+                                    registros_salvos_db()
                                 elif option == 0:
                                     break
                             else:
@@ -386,7 +539,7 @@ def menu() -> None:
     except Exception as error:
         logger.error(error)
     finally:
-        if HarvestReport.updated():
+        if RELATORIO.updated():
             resposta = input(
                 Fore.YELLOW +
                 "\n⚠️ Você tem alterações não salvas. Deseja sair sem salvar? (s/n): "
@@ -398,6 +551,8 @@ def menu() -> None:
         logger.info("Saindo do programa...")
 
 def main():
+    from db_config import db_menu
+
     try:
         db_menu()
         limpar_tela()
@@ -408,5 +563,10 @@ def main():
 
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        # Modo batch: sem menus, prompts nem pausas (ver cli.py)
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     logger.info("Programa Inicializado...")
     main()
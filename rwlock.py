@@ -0,0 +1,74 @@
+"""
+Trava de leitura/escrita para o HarvestReport.
+
+Vários leitores podem segurar a trava ao mesmo tempo; um escritor a segura sozinho. Escritores
+aguardando têm preferência sobre novos leitores, para não ficarem esperando indefinidamente.
+A trava é reentrante por thread: um método que já está lendo (ou escrevendo) pode chamar outro
+que também lê, e quem escreve pode chamar métodos de leitura. Passar de leitura para escrita
+na mesma thread não é permitido, pois dois leitores fazendo isso ficariam presos um ao outro.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class ReadWriteLock:
+    def __init__(self) -> None:
+        self._condicao = threading.Condition(threading.Lock())
+        self._leitores = 0
+        self._escritor: int | None = None
+        self._escritores_aguardando = 0
+        self._local = threading.local()
+
+    def _profundidade(self) -> list:
+        """[leituras, escritas] aninhadas da thread atual."""
+        profundidade = getattr(self._local, "profundidade", None)
+        if profundidade is None:
+            profundidade = self._local.profundidade = [0, 0]
+        return profundidade
+
+    @contextmanager
+    def leitura(self) -> Iterator[None]:
+        profundidade = self._profundidade()
+        externa = profundidade[0] == 0 and profundidade[1] == 0
+        if externa:
+            with self._condicao:
+                while self._escritor is not None or self._escritores_aguardando:
+                    self._condicao.wait()
+                self._leitores += 1
+        profundidade[0] += 1
+        try:
+            yield
+        finally:
+            profundidade[0] -= 1
+            if externa:
+                with self._condicao:
+                    self._leitores -= 1
+                    if self._leitores == 0:
+                        self._condicao.notify_all()
+
+    @contextmanager
+    def escrita(self) -> Iterator[None]:
+        profundidade = self._profundidade()
+        if profundidade[0] and not profundidade[1]:
+            raise RuntimeError("Não é possível obter a trava de escrita enquanto a thread só tem a de leitura.")
+
+        externa = profundidade[1] == 0
+        if externa:
+            with self._condicao:
+                self._escritores_aguardando += 1
+                try:
+                    while self._escritor is not None or self._leitores:
+                        self._condicao.wait()
+                finally:
+                    self._escritores_aguardando -= 1
+                self._escritor = threading.get_ident()
+        profundidade[1] += 1
+        try:
+            yield
+        finally:
+            profundidade[1] -= 1
+            if externa:
+                with self._condicao:
+                    self._escritor = None
+                    self._condicao.notify_all()
@@ -0,0 +1,106 @@
+"""
+Serialização de registros HarvestLoss direto para bytes JSON, em lotes.
+
+Usa o orjson quando ele está instalado; sem ele, cada registro é montado por um modelo de texto
+que reaproveita a codificação das strings repetidas (cultura, observação) e das datas, sem criar
+o dicionário de `HarvestLoss.dict`. Os dois backends geram JSON compacto, um objeto por registro,
+com as chaves na ordem de `dict` e os mesmos valores na leitura, mas o texto pode diferir:
+- expoentes: o orjson grava `1e16` e `1.5e-7`, o backend `json` grava `1e+16` e `1.5e-07`;
+- NaN e infinito: o orjson grava null, o backend `json` grava NaN/Infinity (fora do padrão JSON);
+- inteiros além de 64 bits: o orjson não os aceita, então esses registros são codificados pelo
+  modelo de texto.
+"""
+import json
+import math
+from datetime import date
+from functools import lru_cache
+from typing import Iterable, List
+
+from json_stream import atomic_open, chunked
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+@lru_cache(maxsize=1 << 16)
+def _data_iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+@lru_cache(maxsize=4096)
+def _texto(valor: str | None) -> str:
+    return json.dumps(valor, ensure_ascii=False)
+
+
+def _numero(valor: float) -> str:
+    # json.dumps usa repr para números finitos; NaN e infinito têm grafia própria
+    return repr(valor) if math.isfinite(valor) else json.dumps(valor)
+
+
+def _modelo(loss) -> str:
+    return (f'{{"id":{loss.id},"cultura":{_texto(loss.cultura)},'
+            f'"area_plantada_ha":{_numero(loss.area_plantada_ha)},'
+            f'"prod_estimada_t":{_numero(loss.prod_estimada_t)},'
+            f'"prod_real_t":{_numero(loss.prod_real_t)},'
+            f'"data_colheita":"{_data_iso(loss.data_ordinal)}","obs":{_texto(loss.obs)}}}')
+
+
+def _orjson(loss) -> bytes:
+    try:
+        return _orjson_dict(loss)
+    except TypeError:
+        # orjson só codifica inteiros de até 64 bits
+        return _modelo(loss).encode("utf-8")
+
+
+def _orjson_dict(loss) -> bytes:
+    return orjson.dumps({
+        "id": loss.id,
+        "cultura": loss.cultura,
+        "area_plantada_ha": loss.area_plantada_ha,
+        "prod_estimada_t": loss.prod_estimada_t,
+        "prod_real_t": loss.prod_real_t,
+        "data_colheita": _data_iso(loss.data_ordinal),
+        "obs": loss.obs,
+    })
+
+
+def encode(loss) -> bytes:
+    """Codifica um registro como um objeto JSON compacto (UTF-8)."""
+    if orjson is not None:
+        return _orjson(loss)
+    return _modelo(loss).encode("utf-8")
+
+
+def encode_batch(registros: List, separador: bytes = b"\n") -> bytes:
+    """Codifica um lote de registros, separados por `separador` (sem separador no final)."""
+    if orjson is not None:
+        return separador.join(map(_orjson, registros))
+    return separador.decode("utf-8").join(map(_modelo, registros)).encode("utf-8")
+
+
+def write_records(path: str, registros: Iterable, json_lines: bool = False, tamanho: int = 10000) -> int:
+    """
+    Grava os registros em `path` (de forma atômica), codificados em lotes de `tamanho`: um por
+    linha em JSON Lines ou, sem `json_lines`, como um array JSON com um registro por linha.
+    Retorna a quantidade gravada.
+    """
+    separador = b"\n" if json_lines else b",\n"
+    total = 0
+    with atomic_open(path, binario=True) as f:
+        if not json_lines:
+            f.write(b"[\n")
+        for bloco in chunked(registros, tamanho):
+            if total and not json_lines:
+                f.write(separador)
+            f.write(encode_batch(bloco, separador))
+            if json_lines:
+                f.write(b"\n")
+            total += len(bloco)
+        if not json_lines:
+            f.write(b"\n]\n" if total else b"]\n")
+    return total
@@ -0,0 +1,456 @@
+"""
+Serviço HTTP de consultas ao HarvestReport, para dashboards e scripts (asyncio, só biblioteca padrão).
+
+Os dados ficam em memória e vários clientes são atendidos ao mesmo tempo, com conexões keep-alive.
+O laço de eventos só lê e escreve nos sockets: as consultas rodam em um pool de threads (o
+HarvestReport aceita leituras simultâneas), o banco em uma thread própria e o gráfico no pool.
+Perdas registradas pelo serviço são gravadas no diário do arquivo de entrada a cada
+`--save-interval` segundos e ao encerrar (Ctrl+C ou SIGTERM).
+
+Rotas (respostas em JSON, exceto o gráfico):
+    GET  /perdas?pagina=1&tamanho=20&cultura=soja&inicio=2024-01-01&fim=2024-12-31
+    GET  /perdas/<id>
+    POST /perdas                 {"cultura": "Soja", "area_plantada_ha": 10, "prod_estimada_t": 35,
+                                  "prod_real_t": 30, "data_colheita": "2024-03-01", "obs": ""}
+    GET  /estatisticas?cultura=&inicio=&fim=&fonte=memoria|db
+    GET  /estatisticas/periodo?periodo=ano|mes|safra&cultura=&inicio=&fim=
+    GET  /grafico?fonte=memoria|db   (image/png)
+    GET  /metricas               latência por rota (p50, p90, p99 e máxima, em ms)
+
+Exemplos:
+    python service.py --input data.json --port 8080
+    python service.py --input data.hls --db-backend sqlite
+"""
+import argparse
+import asyncio
+import json
+import math
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import date
+from functools import partial
+from typing import Callable, Deque, Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from core import HarvestLoss, HarvestReport
+from dates import parse_iso_date
+from logger_config import logger
+from serializer import encode, encode_batch
+from validators import validar_nova_perda
+
+TAMANHO_MAXIMO_CORPO = 1 << 20
+TAMANHO_MAXIMO_PAGINA = 1000
+AMOSTRAS_LATENCIA = 2048
+
+STATUS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+JSON = "application/json; charset=utf-8"
+
+# (status, corpo, tipo de conteúdo)
+Resposta = Tuple[int, bytes, str]
+
+
+class ErroHTTP(Exception):
+    """Erro a ser devolvido ao cliente com o status informado."""
+
+    def __init__(self, status: int, mensagem: str) -> None:
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _json(dados, status: int = 200) -> Resposta:
+    return status, json.dumps(dados, ensure_ascii=False).encode("utf-8"), JSON
+
+
+def _parametro(parametros: Dict[str, list], nome: str) -> str | None:
+    valores = parametros.get(nome)
+    return valores[-1] if valores else None
+
+
+def _inteiro(parametros: Dict[str, list], nome: str, padrao: int, minimo: int = 1, maximo: int | None = None) -> int:
+    texto = _parametro(parametros, nome)
+    if texto is None:
+        return padrao
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise ErroHTTP(400, f"Parâmetro '{nome}' deve ser um número inteiro.") from None
+    if valor < minimo or (maximo is not None and valor > maximo):
+        limite = f"entre {minimo} e {maximo}" if maximo is not None else f"a partir de {minimo}"
+        raise ErroHTTP(400, f"Parâmetro '{nome}' deve estar {limite}.")
+    return valor
+
+
+def _data(parametros: Dict[str, list], nome: str) -> date | None:
+    texto = _parametro(parametros, nome)
+    if not texto:
+        return None
+    try:
+        return parse_iso_date(texto)
+    except ValueError:
+        raise ErroHTTP(400, f"Data inválida em '{nome}': {texto}. Use AAAA-MM-DD.") from None
+
+
+def _filtros(parametros: Dict[str, list]) -> dict:
+    return {
+        "cultura": _parametro(parametros, "cultura") or None,
+        "data_inicio": _data(parametros, "inicio"),
+        "data_fim": _data(parametros, "fim"),
+    }
+
+
+class Latencias:
+    """Últimas `amostras` latências de cada rota, para os percentis de /metricas."""
+
+    def __init__(self, amostras: int = AMOSTRAS_LATENCIA) -> None:
+        self._amostras = amostras
+        self._por_rota: Dict[str, Deque[float]] = {}
+        self._totais: Dict[str, int] = {}
+
+    def registrar(self, rota: str, segundos: float) -> None:
+        self._por_rota.setdefault(rota, deque(maxlen=self._amostras)).append(segundos)
+        self._totais[rota] = self._totais.get(rota, 0) + 1
+
+    @staticmethod
+    def _percentil(ordenados: list, p: float) -> float:
+        posicao = max(math.ceil(p / 100 * len(ordenados)) - 1, 0)
+        return round(ordenados[posicao] * 1000, 3)
+
+    def resumo(self) -> dict:
+        resumo = {}
+        for rota, valores in sorted(self._por_rota.items()):
+            ordenados = sorted(valores)
+            resumo[rota] = {
+                "requisicoes": self._totais[rota],
+                "p50_ms": self._percentil(ordenados, 50),
+                "p90_ms": self._percentil(ordenados, 90),
+                "p99_ms": self._percentil(ordenados, 99),
+                "max_ms": round(ordenados[-1] * 1000, 3),
+            }
+        return resumo
+
+
+class HarvestService:
+    def __init__(self,
+                 relatorio: HarvestReport,
+                 salvar_em: str | None = None,
+                 db_backend: str | None = None,
+                 workers: int | None = None,
+                 grafico: str = "perdas_por_cultura.png") -> None:
+        self.relatorio = relatorio
+        self.salvar_em = salvar_em
+        self.grafico = grafico
+        self.latencias = Latencias()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="consulta")
+        # Conexões de banco (ex: SQLite) só podem ser usadas pela thread que as criou
+        self._executor_db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="banco") if db_backend else None
+        self._db_backend = db_backend
+        self._db = None
+        # Conexões abertas, para serem fechadas no encerramento: escritor -> tarefa que a atende
+        self._conexoes: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._rotas: Dict[Tuple[str, str], Callable] = {
+            ("GET", "/perdas"): self._listar,
+            ("POST", "/perdas"): self._registrar,
+            ("GET", "/estatisticas"): self._estatisticas,
+            ("GET", "/estatisticas/periodo"): self._estatisticas_periodo,
+            ("GET", "/grafico"): self._grafico,
+            ("GET", "/metricas"): self._metricas,
+        }
+
+    async def _em_thread(self, funcao: Callable, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(funcao, *args, **kwargs))
+
+    async def _no_banco(self, funcao: Callable):
+        """Executa `funcao(db)` na thread do banco, conectando na primeira vez."""
+        if self._executor_db is None:
+            raise ErroHTTP(400, "Banco de dados não configurado (use --db-backend).")
+
+        def _executar():
+            if self._db is None:
+                from database import create_database
+                self._db = create_database(self._db_backend)
+            return funcao(self._db)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor_db, _executar)
+
+    async def _listar(self, parametros: Dict[str, list], corpo: bytes) -> Resposta:
+        pagina = _inteiro(parametros, "pagina", 1)
+        tamanho = _inteiro(parametros, "tamanho", 20, maximo=TAMANHO_MAXIMO_PAGINA)
+        registros, total = await self._em_thread(self.relatorio.page, pagina, tamanho, **_filtros(parametros))
+        cabecalho = b'{"pagina":%d,"tamanho":%d,"total":%d,"registros":[' % (pagina, tamanho, total)
+        return 200, cabecalho + encode_batch(registros, b",") + b"]}", JSON
+
+    async def _obter(self, id_texto: str) -> Resposta:
+        if not id_texto.isdigit():
+            raise ErroHTTP(404, f"Registro não encontrado: {id_texto}")
+        perda = await self._em_thread(self.relatorio.get, int(id_texto))
+        if perda is None:
+            raise ErroHTTP(404, f"Registro não encontrado: {id_texto}")
+        return 200, encode(perda), JSON
+
+    async def _registrar(self, parametros: Dict[str, list], corpo: bytes) -> Resposta:
+        try:
+            item = json.loads(corpo or b"null")
+        except ValueError:
+            raise ErroHTTP(400, "Corpo da requisição não é um JSON válido.") from None
+        erro = validar_nova_perda(item)
+        if erro is not None:
+            raise ErroHTTP(400, erro)
+        try:
+            data_colheita = parse_iso_date(item["data_colheita"])
+        except (TypeError, ValueError):
+            raise ErroHTTP(400, f"Data inválida: {item['data_colheita']!r}. Use AAAA-MM-DD.") from None
+
+        perda = await self._em_thread(self._registrar_perda, item, data_colheita)
+        return 201, encode(perda), JSON
+
+    def _registrar_perda(self, item: dict, data_colheita: date) -> HarvestLoss:
+        return self.relatorio.register_loss(
+            cultura=item["cultura"],
+            area_plantada_ha=item["area_plantada_ha"],
+            prod_estimada_t=item["prod_estimada_t"],
+            prod_real_t=item["prod_real_t"],
+            data_colheita_str=data_colheita,
+            obs=item.get("obs") or ""
+        )
+
+    async def _estatisticas(self, parametros: Dict[str, list], corpo: bytes) -> Resposta:
+        filtros = _filtros(parametros)
+        fonte = _parametro(parametros, "fonte") or "memoria"
+        if fonte == "db":
+            resumo = await self._no_banco(lambda db: self.relatorio.statistics_summary(db, **filtros))
+        elif fonte == "memoria":
+            resumo = await self._em_thread(self.relatorio.statistics_summary, None, **filtros)
+        else:
+            raise ErroHTTP(400, f"Fonte inválida: {fonte}. Use 'memoria' ou 'db'.")
+        return _json(resumo)
+
+    async def _estatisticas_periodo(self, parametros: Dict[str, list], corpo: bytes) -> Resposta:
+        periodo = _parametro(parametros, "periodo") or "ano"
+        estatisticas = await self._em_thread(self.relatorio.statistics_by_period, periodo, **_filtros(parametros))
+        return _json({chave: stats.dict for chave, stats in estatisticas.items()})
+
+    async def _grafico(self, parametros: Dict[str, list], corpo: bytes) -> Resposta:
+        fonte = _parametro(parametros, "fonte") or "memoria"
+        if fonte == "db":
+            path = await self._no_banco(lambda db: self.relatorio.save_chart(self.grafico, db_instance=db))
+        elif fonte == "memoria":
+            path = await self._em_thread(self.relatorio.save_chart, self.grafico)
+        else:
+            raise ErroHTTP(400, f"Fonte inválida: {fonte}. Use 'memoria' ou 'db'.")
+        if path is None:
+            raise ErroHTTP(404, "Nenhuma perda registrada para análise.")
+
+        def _ler() -> bytes:
+            with open(path, "rb") as f:
+                return f.read()
+
+        return 200, await self._em_thread(_ler), "image/png"
+
+    async def _metricas(self, parametros: Dict[str, list], corpo: bytes) -> Resposta:
+        return _json({"rotas": self.latencias.resumo()})
+
+    async def _despachar(self, metodo: str, alvo: str, corpo: bytes) -> Tuple[str, Resposta]:
+        """Encaminha a requisição para a rota. Retorna (nome da rota para as métricas, resposta)."""
+        url = urlsplit(alvo)
+        caminho = url.path.rstrip("/") or "/"
+        parametros = parse_qs(url.query)
+        rota = f"{metodo} {caminho}"
+        try:
+            if caminho.startswith("/perdas/"):
+                rota = f"{metodo} /perdas/{{id}}"
+                if metodo != "GET":
+                    raise ErroHTTP(405, f"Método {metodo} não permitido em {caminho}.")
+                return rota, await self._obter(caminho[len("/perdas/"):])
+
+            manipulador = self._rotas.get((metodo, caminho))
+            if manipulador is None:
+                if any(caminho == c for _, c in self._rotas):
+                    raise ErroHTTP(405, f"Método {metodo} não permitido em {caminho}.")
+                rota = "desconhecida"
+                raise ErroHTTP(404, f"Rota não encontrada: {caminho}")
+            return rota, await manipulador(parametros, corpo)
+        except ErroHTTP as e:
+            return rota, _json({"erro": str(e)}, e.status)
+        except ValueError as e:
+            return rota, _json({"erro": str(e)}, 400)
+        except Exception as e:
+            logger.error(f"Erro ao atender {metodo} {alvo}: {e}")
+            return rota, _json({"erro": "Erro interno do servidor."}, 500)
+
+    @staticmethod
+    async def _ler_linha(leitor: asyncio.StreamReader) -> bytes:
+        try:
+            return await leitor.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            # readline converte o LimitOverrunError (linha acima do limite do StreamReader) em ValueError
+            raise ErroHTTP(400, "Linha da requisição ou cabeçalho longo demais.") from None
+
+    async def _ler_requisicao(self, leitor: asyncio.StreamReader) -> Tuple[str, str, str, Dict[str, str], bytes] | None:
+        linha = await self._ler_linha(leitor)
+        if not linha:
+            return None
+        try:
+            metodo, alvo, versao = linha.decode("latin-1").split()
+        except ValueError:
+            raise ErroHTTP(400, "Linha de requisição inválida.") from None
+
+        cabecalhos = {}
+        while True:
+            linha = await self._ler_linha(leitor)
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        try:
+            tamanho = int(cabecalhos.get("content-length", 0))
+        except ValueError:
+            raise ErroHTTP(400, "Content-Length inválido.") from None
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise ErroHTTP(413, f"Corpo da requisição maior que {TAMANHO_MAXIMO_CORPO} bytes.")
+        corpo = await leitor.readexactly(tamanho) if tamanho else b""
+        return metodo.upper(), alvo, versao, cabecalhos, corpo
+
+    @staticmethod
+    def _resposta(status: int, corpo: bytes, tipo: str, manter: bool) -> bytes:
+        cabecalho = (f"HTTP/1.1 {status} {STATUS.get(status, '')}\r\n"
+                     f"Content-Type: {tipo}\r\n"
+                     f"Content-Length: {len(corpo)}\r\n"
+                     f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n")
+        return cabecalho.encode("latin-1") + corpo
+
+    async def _atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """Atende as requisições de uma conexão, em sequência, até o cliente encerrá-la."""
+        self._conexoes[escritor] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(leitor)
+                except ErroHTTP as e:
+                    escritor.write(self._resposta(*_json({"erro": str(e)}, e.status), manter=False))
+                    await escritor.drain()
+                    break
+                if requisicao is None:
+                    break
+
+                metodo, alvo, versao, cabecalhos, corpo = requisicao
+                inicio = time.perf_counter()
+                rota, (status, conteudo, tipo) = await self._despachar(metodo, alvo, corpo)
+                conexao = cabecalhos.get("connection", "").lower()
+                manter = conexao == "keep-alive" if versao == "HTTP/1.0" else conexao != "close"
+                escritor.write(self._resposta(status, conteudo, tipo, manter))
+                await escritor.drain()
+                self.latencias.registrar(rota, time.perf_counter() - inicio)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._conexoes.pop(escritor, None)
+            escritor.close()
+            with suppress(ConnectionError):
+                await escritor.wait_closed()
+
+    def salvar(self) -> None:
+        """Grava no diário do arquivo de entrada as perdas registradas desde o último salvamento."""
+        if self.salvar_em is None or not self.relatorio.updated():
+            return
+        self.relatorio.save_json(self.salvar_em)
+
+    async def _salvar_periodicamente(self, intervalo: float) -> None:
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                await self._em_thread(self.salvar)
+            except Exception as e:
+                logger.error(f"Erro ao salvar as perdas registradas: {e}")
+
+    async def servir(self, host: str = "127.0.0.1", porta: int = 8080, intervalo_salvamento: float = 2.0) -> None:
+        servidor = await asyncio.start_server(self._atender, host, porta)
+        endereco = servidor.sockets[0].getsockname()
+        logger.info(f"🌐 Serviço HTTP em http://{endereco[0]}:{endereco[1]} ({len(self.relatorio)} registros).")
+
+        # SIGTERM (kill, systemd, timeout) e SIGINT encerram o serviço normalmente, com o salvamento final
+        parar = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            with suppress(NotImplementedError):  # Windows não tem add_signal_handler
+                loop.add_signal_handler(sinal, parar.set)
+
+        salvamento = asyncio.create_task(self._salvar_periodicamente(intervalo_salvamento))
+        try:
+            await parar.wait()
+            logger.info("🛑 Serviço encerrado.")
+        finally:
+            salvamento.cancel()
+            servidor.close()
+            # Fecha as conexões keep-alive: quem está ocioso lê o fim da conexão e termina, e quem
+            # está no meio de uma requisição termina de respondê-la
+            tarefas = list(self._conexoes.values())
+            for escritor in list(self._conexoes):
+                escritor.close()
+            if tarefas:
+                await asyncio.wait(tarefas, timeout=5)
+
+    def encerrar(self) -> None:
+        """Salva as perdas pendentes e libera as threads e a conexão com o banco."""
+        self.salvar()
+        self._executor.shutdown(wait=True)
+        if self._executor_db is not None:
+            if self._db is not None:
+                self._executor_db.submit(self._db.close).result()
+            self._executor_db.shutdown(wait=True)
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serviço HTTP de consultas às perdas agrícolas.")
+    parser.add_argument("--input", default="data.json", help="arquivo JSON/JSON Lines ou snapshot '.hls'")
+    parser.add_argument("--backend", choices=["row", "columnar"], default="row",
+                        help="backend de armazenamento em memória")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="porta (0 escolhe uma livre)")
+    parser.add_argument("--workers", type=int, default=None, help="threads de consulta")
+    parser.add_argument("--db-backend", choices=["oracle", "sqlite"], default=None,
+                        help="habilita 'fonte=db' nas estatísticas e no gráfico")
+    parser.add_argument("--save-interval", type=float, default=2.0,
+                        help="segundos entre gravações das perdas registradas no diário")
+    parser.add_argument("--chart", default="perdas_por_cultura.png", help="arquivo do gráfico")
+    args = parser.parse_args(argv)
+
+    relatorio = HarvestReport(args.backend)
+    salvar_em = None
+    if args.input.endswith(".hls"):
+        relatorio.load_from_snapshot(args.input)
+    else:
+        relatorio.open_journaled(args.input)
+        salvar_em = args.input
+
+    servico = HarvestService(relatorio, salvar_em=salvar_em, db_backend=args.db_backend,
+                             workers=args.workers, grafico=args.chart)
+    try:
+        asyncio.run(servico.servir(args.host, args.port, args.save_interval))
+    except KeyboardInterrupt:
+        logger.info("🛑 Serviço encerrado.")
+    except OSError as e:
+        logger.error(f"Não foi possível iniciar o serviço: {e}")
+        return 1
+    finally:
+        servico.encerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Snapshot binário dos registros, para reinícios rápidos sem reprocessar o JSON.
+
+Formato (little-endian):
+    cabeçalho de 64 bytes: magic b"HLSNAP\\0\\0", versão (uint32), reservado (uint32),
+                           quantidade de registros (uint64), posição e tamanho das tabelas (uint64 x2);
+    colunas de largura fixa, cada uma alinhada em 8 bytes, na ordem de COLUNAS_SNAPSHOT
+        (id, área, produção estimada, produção real, data ordinal, código da cultura, código da obs);
+    tabelas de dicionário em JSON UTF-8: {"culturas": [...], "obs": [...]}.
+
+O arquivo é aberto com np.memmap em modo cópia-na-escrita: as consultas leem direto das páginas
+mapeadas e nenhuma alteração em memória é gravada de volta no arquivo.
+
+Conversão pela linha de comando:
+    python snapshot.py to-snapshot data.json data.hls
+    python snapshot.py to-json data.hls data.json
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+from typing import Callable, Dict, List
+
+from storage import COLUNAS_SNAPSHOT, ColumnarStorage
+
+MAGIC = b"HLSNAP\0\0"
+VERSAO = 1
+_CABECALHO = struct.Struct("<8sIIQQQ")
+TAMANHO_CABECALHO = 64
+
+
+def _alinhar(posicao: int) -> int:
+    return (posicao + 7) // 8 * 8
+
+
+def _posicoes_colunas(n: int) -> Dict[str, int]:
+    import numpy as np
+
+    posicoes = {}
+    posicao = TAMANHO_CABECALHO
+    for nome, tipo in COLUNAS_SNAPSHOT.items():
+        posicoes[nome] = posicao
+        posicao = _alinhar(posicao + n * np.dtype(tipo).itemsize)
+    posicoes["_fim"] = posicao
+    return posicoes
+
+
+def write_snapshot(path: str, storage: ColumnarStorage) -> int:
+    """Grava o conteúdo de um ColumnarStorage em `path` (de forma atômica). Retorna a quantidade."""
+    import numpy as np
+
+    colunas, culturas, observacoes = storage.to_columns()
+    n = len(colunas["ids"])
+    posicoes = _posicoes_colunas(n)
+    tabelas = json.dumps({"culturas": culturas, "obs": observacoes}, ensure_ascii=False).encode("utf-8")
+
+    temporario = f"{path}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(_CABECALHO.pack(MAGIC, VERSAO, 0, n, posicoes["_fim"], len(tabelas)).ljust(TAMANHO_CABECALHO, b"\0"))
+        for nome, tipo in COLUNAS_SNAPSHOT.items():
+            f.write(b"\0" * (posicoes[nome] - f.tell()))
+            np.ascontiguousarray(colunas[nome], dtype=tipo).tofile(f)
+        f.write(b"\0" * (posicoes["_fim"] - f.tell()))
+        f.write(tabelas)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, path)
+    return n
+
+
+def read_header(path: str) -> dict:
+    with open(path, "rb") as f:
+        dados = f.read(_CABECALHO.size)
+    if len(dados) < _CABECALHO.size:
+        raise ValueError(f"Arquivo '{path}' não é um snapshot válido.")
+
+    magic, versao, _, n, pos_tabelas, tam_tabelas = _CABECALHO.unpack(dados)
+    if magic != MAGIC:
+        raise ValueError(f"Arquivo '{path}' não é um snapshot válido.")
+    if versao != VERSAO:
+        raise ValueError(f"Versão de snapshot não suportada: {versao} (esperada {VERSAO}).")
+    return {"versao": versao, "registros": n, "pos_tabelas": pos_tabelas, "tam_tabelas": tam_tabelas}
+
+
+def open_snapshot(path: str, fabrica: Callable) -> ColumnarStorage:
+    """Mapeia o snapshot em memória e retorna um ColumnarStorage que lê direto do arquivo."""
+    import numpy as np
+
+    cabecalho = read_header(path)
+    n = cabecalho["registros"]
+    posicoes = _posicoes_colunas(n)
+
+    with open(path, "rb") as f:
+        f.seek(cabecalho["pos_tabelas"])
+        tabelas = json.loads(f.read(cabecalho["tam_tabelas"]).decode("utf-8"))
+
+    colunas = {
+        nome: (np.memmap(path, dtype=tipo, mode="c", offset=posicoes[nome], shape=(n,))
+               if n else np.zeros(0, dtype=tipo))
+        for nome, tipo in COLUNAS_SNAPSHOT.items()
+    }
+    return ColumnarStorage.from_columns(fabrica, colunas, tabelas["culturas"], tabelas["obs"])
+
+
+def main(argv: List[str] | None = None) -> int:
+    from core import HarvestReport
+
+    parser = argparse.ArgumentParser(description="Conversão entre JSON e snapshot binário.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    para_snapshot = sub.add_parser("to-snapshot", help="JSON/JSON Lines -> snapshot")
+    para_snapshot.add_argument("origem")
+    para_snapshot.add_argument("destino")
+    para_json = sub.add_parser("to-json", help="snapshot -> JSON ('.jsonl' grava JSON Lines)")
+    para_json.add_argument("origem")
+    para_json.add_argument("destino")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.origem):
+        print(f"❌ Arquivo '{args.origem}' não encontrado.")
+        return 1
+
+    relatorio = HarvestReport("columnar")
+    if args.comando == "to-snapshot":
+        relatorio.load_from_json(args.origem)
+        relatorio.export_to_snapshot(args.destino)
+    else:
+        relatorio.load_from_snapshot(args.origem)
+        relatorio.export_to_json(args.destino)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Relatório de tempo de inicialização da aplicação.
+
+Importa o módulo alvo em um interpretador novo com `-X importtime` e resume quanto cada
+dependência direta custa, além de indicar se alguma dependência pesada foi carregada cedo demais.
+"""
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Dependências que devem ser carregadas apenas pelas funcionalidades que as usam
+DEPENDENCIAS_PESADAS = ("matplotlib", "numpy", "oracledb", "dotenv")
+
+
+def _parse_importtime(saida: str) -> List[Dict]:
+    """Converte as linhas 'import time: self | cumulative | pacote' em dicionários com a profundidade."""
+    entradas = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, cumulativo, nome = linha[len("import time:"):].split("|")
+        profundidade = (len(nome) - len(nome.lstrip(" ")) - 1) // 2
+        entradas.append({
+            "modulo": nome.strip(),
+            "profundidade": profundidade,
+            "proprio_ms": int(proprio) / 1000,
+            "cumulativo_ms": int(cumulativo) / 1000,
+        })
+    return entradas
+
+
+def import_time_report(modulo: str = "main", top: int = 10) -> dict:
+    """Mede a importação de `modulo` a frio e retorna o resumo (tempos em milissegundos)."""
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, cwd=diretorio
+    )
+    tempo_total = (time.perf_counter() - inicio) * 1000
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar '{modulo}': {processo.stderr.strip().splitlines()[-1]}")
+
+    entradas = _parse_importtime(processo.stderr)
+    posicao = next((i for i in range(len(entradas) - 1, -1, -1)
+                    if entradas[i]["modulo"] == modulo and entradas[i]["profundidade"] == 0), None)
+    raiz = entradas[posicao] if posicao is not None else None
+
+    # O importtime lista os filhos antes do pai: as importações diretas do módulo alvo são as de
+    # profundidade 1 entre a entrada de topo anterior e a dele
+    diretas = []
+    for e in reversed(entradas[:posicao or 0]):
+        if e["profundidade"] == 0:
+            break
+        if e["profundidade"] == 1:
+            diretas.append(e)
+    diretas.sort(key=lambda e: e["cumulativo_ms"], reverse=True)
+    carregados = {e["modulo"].split(".")[0] for e in entradas}
+
+    return {
+        "modulo": modulo,
+        "importacao_ms": round(raiz["cumulativo_ms"] if raiz else 0.0, 1),
+        "processo_ms": round(tempo_total, 1),
+        "maiores_importacoes": [
+            {"modulo": e["modulo"], "cumulativo_ms": round(e["cumulativo_ms"], 1)} for e in diretas[:top]
+        ],
+        "dependencias_pesadas_carregadas": [d for d in DEPENDENCIAS_PESADAS if d in carregados],
+    }
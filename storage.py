@@ -0,0 +1,410 @@
+"""
+Backends de armazenamento usados pelo HarvestReport.
+
+- RowStorage: guarda objetos HarvestLoss em um dicionário ordenado por inserção (padrão);
+- ColumnarStorage: guarda os campos em arrays NumPy contíguos e só monta objetos
+  HarvestLoss quando alguém pede as linhas.
+"""
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# O numpy é opcional e só é importado quando um ColumnarStorage é criado
+np = None
+
+
+def _importar_numpy() -> None:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise RuntimeError("O backend colunar requer o pacote 'numpy'.") from e
+        np = numpy
+
+
+# (quantidade, soma dos percentuais, soma estimada, soma real, menor percentual, maior percentual)
+Agregado = Tuple[int, float, float, float, float, float]
+
+
+# Chave do índice de datas: data ordinal nos bits altos e id nos baixos, para ordenar por (data, id)
+DESLOCAMENTO_DATA = 1 << 40
+
+
+def chave_data(ordinal: int, id_: int) -> int:
+    return ordinal * DESLOCAMENTO_DATA + id_
+
+
+def percentual_perda(estimada: float, real: float) -> float:
+    """Percentual de perda da produção real em relação à estimada, com duas casas."""
+    return round((estimada - real) / estimada * 100, 2)
+
+
+class RowStorage:
+    """Armazenamento em linhas: um HarvestLoss por registro, indexado pelo id."""
+
+    nome = "row"
+
+    def __init__(self) -> None:
+        self._linhas: Dict[int, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._linhas)
+
+    def __iter__(self) -> Iterator:
+        return iter(list(self._linhas.values()))
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ in self._linhas
+
+    def get(self, id_: int):
+        return self._linhas.get(id_)
+
+    def append(self, loss) -> None:
+        self._linhas.pop(loss.id, None)
+        self._linhas[loss.id] = loss
+
+    def extend(self, registros: Iterable) -> None:
+        for loss in registros:
+            self.append(loss)
+
+    def remove(self, id_: int):
+        """Remove e retorna o registro com o id informado (ou None)."""
+        return self._linhas.pop(id_, None)
+
+    def clear(self) -> None:
+        self._linhas.clear()
+
+    def max_id(self) -> int:
+        return max(self._linhas, default=0)
+
+    def ids(self) -> List[int]:
+        return list(self._linhas)
+
+    def chaves_por_data(self) -> List[int]:
+        """Chaves (data, id) de todos os registros, em ordem crescente (ver `chave_data`)."""
+        return sorted(chave_data(loss.data_ordinal, id_) for id_, loss in self._linhas.items())
+
+    def get_many(self, ids: Iterable[int]) -> List:
+        return [self._linhas[id_] for id_ in ids]
+
+    def fatia(self, inicio: int, fim: int) -> List:
+        """Registros nas posições [inicio, fim), na ordem de inserção."""
+        return list(islice(self._linhas.values(), inicio, fim))
+
+    def ids_por_cultura(self) -> Dict[str, List[int]]:
+        """Retorna {cultura em minúsculas: ids na ordem de inserção}."""
+        resultado: Dict[str, List[int]] = {}
+        for loss in self._linhas.values():
+            resultado.setdefault(loss.cultura.lower(), []).append(loss.id)
+        return resultado
+
+    def agregados_por_cultura(self) -> Dict[str, Agregado]:
+        """Retorna {cultura em minúsculas: Agregado}, na ordem de primeira aparição."""
+        resultado: Dict[str, list] = {}
+        for loss in self._linhas.values():
+            pct = percentual_perda(loss.prod_estimada_t, loss.prod_real_t)
+            agregado = resultado.get(loss.cultura.lower())
+            if agregado is None:
+                resultado[loss.cultura.lower()] = [1, pct, loss.prod_estimada_t, loss.prod_real_t, pct, pct]
+                continue
+            agregado[0] += 1
+            agregado[1] += pct
+            agregado[2] += loss.prod_estimada_t
+            agregado[3] += loss.prod_real_t
+            agregado[4] = min(agregado[4], pct)
+            agregado[5] = max(agregado[5], pct)
+        return {cultura: tuple(agregado) for cultura, agregado in resultado.items()}
+
+
+# Colunas persistidas em snapshot, na ordem do arquivo, com o tipo NumPy de cada uma
+COLUNAS_SNAPSHOT = {
+    "ids": "<i8",
+    "area": "<f8",
+    "estimada": "<f8",
+    "real": "<f8",
+    "datas": "<i4",
+    "cultura": "<i4",
+    "obs_cod": "<i4",
+}
+
+
+class ColumnarStorage:
+    """
+    Armazenamento colunar em arrays NumPy.
+
+    Área, produções, data (ordinal) e os códigos de cultura e observação ficam em arrays
+    contíguos; cultura e observação são codificadas por dicionário. Remoções marcam a linha
+    como inativa e o espaço é compactado quando metade das linhas estiver inativa.
+    Os valores numéricos são guardados como float, então `dict` devolve 50.0 onde o JSON tinha 50.
+    A `fabrica` recebe a data de colheita já como ordinal.
+    """
+
+    nome = "columnar"
+
+    def __init__(self, fabrica: Callable, capacidade: int = 1024) -> None:
+        _importar_numpy()
+
+        self._fabrica = fabrica
+        self._n = 0
+        self._inativos = 0
+        self._pos_cache: Dict[int, int] | None = {}
+        self._culturas: List[str] = []
+        self._cod_cultura: Dict[str, int] = {}
+        self._obs: List[str] = [""]
+        self._cod_obs: Dict[str, int] = {"": 0}
+        self._alocar(max(capacidade, 16))
+
+    def _alocar(self, capacidade: int) -> None:
+        self._ids = np.zeros(capacidade, dtype=np.int64)
+        self._area = np.zeros(capacidade, dtype=np.float64)
+        self._estimada = np.zeros(capacidade, dtype=np.float64)
+        self._real = np.zeros(capacidade, dtype=np.float64)
+        self._datas = np.zeros(capacidade, dtype=np.int32)
+        self._cultura = np.zeros(capacidade, dtype=np.int32)
+        self._obs_cod = np.zeros(capacidade, dtype=np.int32)
+        self._ativo = np.zeros(capacidade, dtype=bool)
+
+    def _colunas(self) -> Tuple[str, ...]:
+        return "_ids", "_area", "_estimada", "_real", "_datas", "_cultura", "_obs_cod", "_ativo"
+
+    def _garantir_capacidade(self, extra: int) -> None:
+        necessario = self._n + extra
+        atual = len(self._ids)
+        if necessario <= atual:
+            return
+        nova = max(necessario, atual * 2)
+        for nome in self._colunas():
+            antigo = getattr(self, nome)
+            novo = np.zeros(nova, dtype=antigo.dtype)
+            novo[:self._n] = antigo[:self._n]
+            setattr(self, nome, novo)
+
+    def _codigo(self, valor: str, tabela: List[str], codigos: Dict[str, int]) -> int:
+        codigo = codigos.get(valor)
+        if codigo is None:
+            codigo = len(tabela)
+            tabela.append(valor)
+            codigos[valor] = codigo
+        return codigo
+
+    def _linha(self, i: int):
+        return self._fabrica(
+            id=int(self._ids[i]),
+            cultura=self._culturas[self._cultura[i]],
+            area_plantada_ha=float(self._area[i]),
+            prod_estimada_t=float(self._estimada[i]),
+            prod_real_t=float(self._real[i]),
+            data_colheita=int(self._datas[i]),
+            obs=self._obs[self._obs_cod[i]]
+        )
+
+    @property
+    def _pos(self) -> Dict[int, int]:
+        """Mapa id -> linha, montado sob demanda (ex: após adotar colunas de um snapshot)."""
+        if self._pos_cache is None:
+            indices = self._linhas_ativas()
+            self._pos_cache = dict(zip(self._ids[indices].tolist(), indices.tolist()))
+        return self._pos_cache
+
+    def _linhas_ativas(self):
+        return np.flatnonzero(self._ativo[:self._n])
+
+    def _materializar(self, indices) -> List:
+        ids = self._ids[indices].tolist()
+        areas = self._area[indices].tolist()
+        estimadas = self._estimada[indices].tolist()
+        reais = self._real[indices].tolist()
+        datas = self._datas[indices].tolist()
+        culturas = self._cultura[indices].tolist()
+        obs = self._obs_cod[indices].tolist()
+        return [
+            self._fabrica(
+                id=ids[k],
+                cultura=self._culturas[culturas[k]],
+                area_plantada_ha=areas[k],
+                prod_estimada_t=estimadas[k],
+                prod_real_t=reais[k],
+                data_colheita=datas[k],
+                obs=self._obs[obs[k]]
+            )
+            for k in range(len(ids))
+        ]
+
+    @classmethod
+    def from_columns(cls, fabrica: Callable, colunas: Dict[str, object], culturas: List[str],
+                     observacoes: List[str]) -> "ColumnarStorage":
+        """
+        Cria o armazenamento adotando arrays já prontos (ex: np.memmap de um snapshot) sem copiá-los.
+        `colunas` deve ter as chaves de `COLUNAS_SNAPSHOT`; os arrays só são copiados para a memória
+        se o armazenamento precisar crescer.
+        """
+        storage = cls(fabrica, capacidade=0)
+        n = len(colunas["ids"])
+        for nome, coluna in colunas.items():
+            setattr(storage, f"_{nome}", coluna)
+        storage._ativo = np.ones(n, dtype=bool)
+        storage._n = n
+        storage._pos_cache = None
+        storage._culturas = list(culturas)
+        storage._cod_cultura = {nome: i for i, nome in enumerate(storage._culturas)}
+        storage._obs = list(observacoes)
+        storage._cod_obs = {nome: i for i, nome in enumerate(storage._obs)}
+        return storage
+
+    def to_columns(self) -> Tuple[Dict[str, object], List[str], List[str]]:
+        """Retorna (colunas só com as linhas ativas, tabela de culturas, tabela de observações)."""
+        indices = self._linhas_ativas()
+        colunas = {nome: getattr(self, f"_{nome}")[indices] for nome in COLUNAS_SNAPSHOT}
+        return colunas, list(self._culturas), list(self._obs)
+
+    def __len__(self) -> int:
+        return self._n - self._inativos
+
+    def __iter__(self) -> Iterator:
+        indices = self._linhas_ativas()
+        for inicio in range(0, len(indices), 4096):
+            yield from self._materializar(indices[inicio:inicio + 4096])
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ in self._pos
+
+    def ids(self) -> List[int]:
+        return self._ids[self._linhas_ativas()].tolist()
+
+    def chaves_por_data(self) -> List[int]:
+        indices = self._linhas_ativas()
+        chaves = self._datas[indices].astype(np.int64) * DESLOCAMENTO_DATA + self._ids[indices]
+        return np.sort(chaves).tolist()
+
+    def get(self, id_: int):
+        i = self._pos.get(id_)
+        return None if i is None else self._linha(i)
+
+    def append(self, loss) -> None:
+        self.extend([loss])
+
+    def extend(self, registros: Iterable) -> None:
+        # Um id repetido substitui o anterior e vai para o fim, como no RowStorage
+        unicos: Dict[int, object] = {}
+        for loss in registros:
+            unicos.pop(loss.id, None)
+            unicos[loss.id] = loss
+        registros = list(unicos.values())
+        if not registros:
+            return
+
+        for loss in registros:
+            if loss.id in self._pos:
+                self.remove(loss.id)
+
+        self._garantir_capacidade(len(registros))
+        inicio, fim = self._n, self._n + len(registros)
+        self._ids[inicio:fim] = [loss.id for loss in registros]
+        self._area[inicio:fim] = [loss.area_plantada_ha for loss in registros]
+        self._estimada[inicio:fim] = [loss.prod_estimada_t for loss in registros]
+        self._real[inicio:fim] = [loss.prod_real_t for loss in registros]
+        self._datas[inicio:fim] = [loss.data_ordinal for loss in registros]
+        self._cultura[inicio:fim] = [
+            self._codigo(loss.cultura, self._culturas, self._cod_cultura) for loss in registros
+        ]
+        self._obs_cod[inicio:fim] = [
+            self._codigo(loss.obs or "", self._obs, self._cod_obs) for loss in registros
+        ]
+        self._ativo[inicio:fim] = True
+        for i, loss in enumerate(registros, start=inicio):
+            self._pos[loss.id] = i
+        self._n = fim
+
+    def remove(self, id_: int):
+        """Remove e retorna o registro com o id informado (ou None)."""
+        i = self._pos.pop(id_, None)
+        if i is None:
+            return None
+        loss = self._linha(i)
+        self._ativo[i] = False
+        self._inativos += 1
+        if self._inativos > 1024 and self._inativos * 2 > self._n:
+            self._compactar()
+        return loss
+
+    def _compactar(self) -> None:
+        indices = self._linhas_ativas()
+        for nome in self._colunas():
+            coluna = getattr(self, nome)
+            coluna[:len(indices)] = coluna[indices]
+        self._n = len(indices)
+        self._ativo[self._n:] = False
+        self._inativos = 0
+        self._pos_cache = None
+
+    def clear(self) -> None:
+        self._n = 0
+        self._inativos = 0
+        self._pos_cache = {}
+        self._ativo[:] = False
+
+    def max_id(self) -> int:
+        indices = self._linhas_ativas()
+        return int(self._ids[indices].max()) if len(indices) else 0
+
+    def _culturas_agrupadas(self):
+        """Retorna (nomes em minúsculas, código agrupado por linha ativa, índices ativos)."""
+        nomes: List[str] = []
+        grupo: Dict[str, int] = {}
+        mapa = np.array(
+            [self._codigo(c.lower(), nomes, grupo) for c in self._culturas] or [0],
+            dtype=np.int32
+        )
+        indices = self._linhas_ativas()
+        return nomes, mapa[self._cultura[indices]], indices
+
+    def fatia(self, inicio: int, fim: int) -> List:
+        return self._materializar(self._linhas_ativas()[inicio:fim])
+
+    def get_many(self, ids: Iterable[int]) -> List:
+        indices = np.fromiter((self._pos[id_] for id_ in ids), dtype=np.int64)
+        return self._materializar(indices)
+
+    def ids_por_cultura(self) -> Dict[str, List[int]]:
+        """Retorna {cultura em minúsculas: ids na ordem de inserção}."""
+        nomes, grupos, indices = self._culturas_agrupadas()
+        if not len(indices):
+            return {}
+
+        ordem = np.argsort(grupos, kind="stable")
+        ids = self._ids[indices][ordem]
+        contagem = np.bincount(grupos, minlength=len(nomes))
+        fatias = np.split(ids, np.cumsum(contagem)[:-1])
+
+        presentes, primeira = np.unique(grupos, return_index=True)
+        return {nomes[g]: fatias[g].tolist() for g in presentes[np.argsort(primeira)].tolist()}
+
+    def agregados_por_cultura(self) -> Dict[str, Agregado]:
+        """Retorna {cultura em minúsculas: Agregado}, calculado de forma vetorizada."""
+        nomes, grupos, indices = self._culturas_agrupadas()
+        if not len(indices):
+            return {}
+
+        estimada = self._estimada[indices]
+        real = self._real[indices]
+        percentuais = np.round((estimada - real) / estimada * 100, 2)
+        k = len(nomes)
+        contagem = np.bincount(grupos, minlength=k)
+        soma_pct = np.bincount(grupos, weights=percentuais, minlength=k)
+        soma_estimada = np.bincount(grupos, weights=estimada, minlength=k)
+        soma_real = np.bincount(grupos, weights=real, minlength=k)
+
+        # Mínimo e máximo por grupo: ordena por grupo e reduz cada fatia contígua
+        ordem = np.argsort(grupos, kind="stable")
+        presentes, inicio = np.unique(grupos[ordem], return_index=True)
+        minimos = np.minimum.reduceat(percentuais[ordem], inicio)
+        maximos = np.maximum.reduceat(percentuais[ordem], inicio)
+        extremos = {g: (float(mn), float(mx)) for g, mn, mx in zip(presentes.tolist(), minimos, maximos)}
+
+        # Mantém a ordem de primeira aparição, como no backend de linhas
+        presentes, primeira = np.unique(grupos, return_index=True)
+        return {
+            nomes[g]: (int(contagem[g]), float(soma_pct[g]), float(soma_estimada[g]), float(soma_real[g]),
+                       *extremos[g])
+            for g in presentes[np.argsort(primeira)].tolist()
+        }
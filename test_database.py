@@ -0,0 +1,118 @@
+"""
+Testes do caminho em lote do banco (create_many, apply_changes) usando o SQLite em memória,
+por meio de HarvestReport.export_to_db, load_from_db e sync_to_db.
+"""
+from datetime import date
+
+import pytest
+
+from core import HarvestLoss, HarvestReport
+from database import SQLiteDatabase
+
+
+@pytest.fixture
+def db():
+    banco = SQLiteDatabase(":memory:")
+    yield banco
+    banco.close()
+
+
+def _relatorio(*culturas: str) -> HarvestReport:
+    relatorio = HarvestReport()
+    for dia, cultura in enumerate(culturas, start=1):
+        relatorio.register_loss(cultura, 10.0, 30.0, 25.0 + dia, date(2024, 3, dia), obs="" if dia % 2 else "chuva")
+    return relatorio
+
+
+def _carregado(db: SQLiteDatabase) -> HarvestReport:
+    relatorio = HarvestReport()
+    relatorio.load_from_db(db.read_iter())
+    return relatorio
+
+
+def test_export_ignora_duplicados(db):
+    relatorio = _relatorio("Soja", "Milho", "Cana")
+
+    assert relatorio.export_to_db(db, batch_size=2) == (3, 0)
+    assert db.count() == 3
+
+    # A segunda exportação só encontra duplicados: nada é inserido, nada falha
+    assert db.create_many([(p.cultura, p.area_plantada_ha, p.prod_estimada_t, p.prod_real_t,
+                            p.data_colheita, p.obs) for p in relatorio]) == (0, 3, [])
+    assert relatorio.sync_to_db(db) == (0, 0, 0)
+    assert db.count() == 3
+
+
+def test_create_many_refaz_lote_com_falha_linha_a_linha(db):
+    linhas = [
+        ("Soja", 10.0, 30.0, 27.0, date(2024, 3, 1), ""),
+        (None, 10.0, 30.0, 27.0, date(2024, 3, 2), ""),  # viola o NOT NULL de cultura
+        ("Milho", 10.0, 30.0, 27.0, date(2024, 3, 3), ""),
+    ]
+
+    inseridos, duplicados, falhas = db.create_many(linhas, batch_size=3)
+
+    assert (inseridos, duplicados) == (2, 0)
+    assert [posicao for posicao, _ in falhas] == [1]
+    assert sorted(linha[1] for linha in db.read()) == ["Milho", "Soja"]
+
+
+def test_load_from_db_preserva_os_registros(db):
+    _relatorio("Soja", "Milho").export_to_db(db)
+
+    relatorio = _carregado(db)
+
+    assert [(p.id, p.cultura, p.data_colheita, p.obs) for p in relatorio] == [
+        (1, "Soja", date(2024, 3, 1), ""),
+        (2, "Milho", date(2024, 3, 2), "chuva"),
+    ]
+    assert not relatorio.updated()
+
+
+def test_sync_envia_so_as_alteracoes(db):
+    _relatorio("Soja", "Milho", "Cana").export_to_db(db)
+    relatorio = _carregado(db)
+
+    editado = relatorio.get(2)
+    relatorio.replace_loss(HarvestLoss(2, "Trigo", 12.0, 40.0, 33.0, editado.data_colheita, "editado"))
+    relatorio.remove_loss(3)
+    relatorio.register_loss("Arroz", 5.0, 20.0, 18.0, date(2024, 4, 1))
+
+    assert relatorio.sync_to_db(db) == (1, 1, 1)
+    assert relatorio.pending_db_changes() == ([], [], [])
+    assert sorted(db.read()) == sorted(
+        (p.id, p.cultura, p.area_plantada_ha, p.prod_estimada_t, p.prod_real_t, p.data_colheita, p.obs or None)
+        for p in relatorio
+    )
+
+
+def test_sync_usa_o_id_gerado_pelo_banco(db):
+    _relatorio("Soja").export_to_db(db)
+    relatorio = _carregado(db)
+
+    # Outro cliente insere depois da carga: o id provisório em memória (2) já está ocupado no banco
+    db.create("Milho", 1.0, 5.0, 4.0, date(2024, 5, 1))
+    provisorio = relatorio.register_loss("Cana", 1.0, 5.0, 4.0, date(2024, 5, 2))
+    assert provisorio.id == 2
+
+    assert relatorio.sync_to_db(db) == (1, 0, 0)
+    assert relatorio.get(2) is None
+    assert relatorio.get(3).cultura == "Cana"
+    assert [p.cultura for p in relatorio.filter_by_culture("cana")] == ["Cana"]
+    assert relatorio.register_loss("Feijão", 1.0, 5.0, 4.0, date(2024, 5, 3)).id == 4
+
+
+def test_sync_com_falha_nao_grava_nada(db):
+    _relatorio("Soja", "Milho").export_to_db(db)
+    relatorio = _carregado(db)
+    antes = sorted(db.read())
+
+    relatorio.register_loss("Cana", 1.0, 5.0, 4.0, date(2024, 5, 2))
+    editado = relatorio.get(1)
+    # area_plantada_ha nula viola o NOT NULL: o UPDATE falha depois do INSERT já executado
+    relatorio.replace_loss(HarvestLoss(1, editado.cultura, None, 30.0, 20.0, editado.data_colheita))
+
+    assert relatorio.sync_to_db(db) is None
+    assert sorted(db.read()) == antes
+    inserir, atualizar, remover = relatorio.pending_db_changes()
+    assert ([p.cultura for p in inserir], [p.id for p in atualizar], remover) == (["Cana"], [1], [])
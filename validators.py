@@ -22,4 +22,39 @@ def validar_bool(data: str) -> bool:
         return data.lower() in ["true", "false", "sim", "não", "nao", "1", "0"]
     if isinstance(data, int):
         return data in [0, 1]
-    return False
\ No newline at end of file
+    return False
+
+CAMPOS_OBRIGATORIOS = ("id", "cultura", "area_plantada_ha", "prod_estimada_t", "prod_real_t", "data_colheita")
+
+
+def _numero(valor) -> bool:
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def validar_registro(item: dict) -> str | None:
+    """Valida um registro no formato de `HarvestLoss.dict`. Retorna a mensagem de erro ou None."""
+    return _validar(item, CAMPOS_OBRIGATORIOS)
+
+
+def validar_nova_perda(item: dict) -> str | None:
+    """Valida os dados de uma perda a registrar (formato de `HarvestLoss.dict`, sem o id)."""
+    return _validar(item, CAMPOS_OBRIGATORIOS[1:])
+
+
+def _validar(item: dict, campos: tuple) -> str | None:
+    if not isinstance(item, dict):
+        return "registro não é um objeto JSON"
+    ausentes = [campo for campo in campos if campo not in item]
+    if ausentes:
+        return f"campos ausentes: {', '.join(ausentes)}"
+    if "id" in campos and (not isinstance(item["id"], int) or isinstance(item["id"], bool) or item["id"] <= 0):
+        return f"id inválido: {item['id']!r}"
+    if not validar_str(item["cultura"]):
+        return "cultura inválida"
+    if not all(_numero(item[campo]) for campo in ("area_plantada_ha", "prod_estimada_t", "prod_real_t")):
+        return "área e produções devem ser numéricas"
+    if item["area_plantada_ha"] <= 0 or item["prod_estimada_t"] <= 0 or item["prod_real_t"] < 0:
+        return "área e produção estimada devem ser maiores que zero e a produção real não negativa"
+    if not isinstance(item.get("obs", ""), (str, type(None))):
+        return "obs deve ser texto"
+    return None